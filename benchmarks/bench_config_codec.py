@@ -0,0 +1,167 @@
+"""
+配置编码基准测试：对比 v1（JSON + zlib）、v2（二进制）与 v2 + 预设字典编码的长度与编解码耗时。
+运行前会检查各版本编码的往返结果是否一致，以及此前生成的 v1 / v2 链接仍能被解码。
+
+默认使用 make_group_config 生成的配置，只对比 v1 与 v2（以及已登记的预设字典）。
+传入 --samples（真实或匿名化的 server_data.json / 导出配置）时评估预设字典：按 --holdout 的比例留出一部分群组，
+只用其余群组训练字典（train_config_zdict.train），再在留出的、未参与训练的群组上测量，避免训练数据带来的虚高。
+
+用法:
+    python benchmarks/bench_config_codec.py [--sizes 5 20 80 300] [--repeat 200] [--json]
+    python benchmarks/bench_config_codec.py --samples data/server_data.json [export.json ...] [--holdout 0.3]
+"""
+import argparse
+import json
+import random
+import time
+from math import ceil
+
+from fixtures import init_nonebot, make_group_config
+from train_config_zdict import load_groups, train
+
+init_nonebot()
+
+from xducraft_bot.plugins.xducraft_mc_status import config_coder  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.config_coder import compress_config, decompress_config  # noqa: E402
+
+# (名称, 编码版本, 是否使用预设字典)；没有登记任何预设字典时不测量 v2+zdict
+CODECS = [("v1", 1, False), ("v2", 2, False)]
+ZDICT_CODEC = ("v2+zdict", 2, True)
+
+# 此前版本生成的链接（make_group_config(4, seed=7)），新版本必须仍能解码
+LEGACY_LINKS = (
+    "eNptj9GKwyAQRX8luK8io2bGpG-hJX-wUEjykBgDhaYtbYUU9uM7tllYdlfhouPcM9dGtJHQAaulwDr4qY1ogNpY5uXrbF3qGSD7yva7z-21n-"
+    "5CgmwacQO1jNGnivLneWMopyK9gRR1XVUAQup0-fZlH1yBTjZi9vqXF5EweTmRQ50mD7jC9E-CXgmXY_8wajmMh_6kwhiVP4lkLh3wd4qy0AwiNz"
+    "Ioh6QW8dWAHphOwRasBiYuIq-6_hPWrKNuVs1ehaWfL8fwTmss2TXtv7yqQnyH59113RMOXGPu",
+    "2~AeNSeDZ1w7Pedc_W9z_taHs5af7Tju3Ppm1QqFGIcAl1LkpMK2Fzc3N0NDDghvEVlA3Ynk-Z_3TtDCQhQ_6XcxpeLGt8PnPv0wm9T3uncj7d0P"
+    "9sx45nHf1spkDg5oak2Ago5OhoasrAYqhlK8HIwsXIxMzCysbOwcZZbKBXkVKaDFKnl5yfa2VkZmJmwZWbbIgmbGpqZspVkJNYaaRXkZmSmZinl5"
+    "pSqpecx1VsrJebrJdakZhbkJMKUWtkbGYMAA",
+)
+
+
+def _encode(config, version, zdict):
+    enabled = config_coder.CONFIG_CODEC_ZDICT
+    config_coder.CONFIG_CODEC_ZDICT = zdict
+    try:
+        return compress_config(config, version)
+    finally:
+        config_coder.CONFIG_CODEC_ZDICT = enabled
+
+
+def _count_servers(servers):
+    return sum(1 + _count_servers(server.get("children") or []) for server in servers)
+
+
+def split_samples(groups, holdout):
+    """按固定的随机顺序将样例群组分为 (训练集, 留出集)，两者至少各有一个群组。"""
+    if len(groups) < 2:
+        raise SystemExit("评估预设字典至少需要两个群组的样例配置（一个用于训练，一个用于测量）")
+    shuffled = list(groups)
+    random.Random(0).shuffle(shuffled)
+    held_out = min(max(1, ceil(len(shuffled) * holdout)), len(shuffled) - 1)
+    return shuffled[held_out:], shuffled[:held_out]
+
+
+def _edge_cases():
+    """往返检查用的边界配置：空配置、空字段、非 ASCII 字符与较深的子树。"""
+    deep = {"footer": "", "servers": []}
+    level = deep["servers"]
+    for index in range(40):
+        node = {"ip": f"d{index}.example.com", "comment": "", "tag": "", "tag_color": "",
+                "ignore_in_list": False, "hide_ip": False, "display_name": "", "children": []}
+        level.append(node)
+        level = node["children"]
+    return [
+        {},
+        {"footer": "", "servers": []},
+        {"footer": "页脚 ✓", "servers": [{"ip": "a.example.com", "tag": "生存", "display_name": "名字 §a彩色",
+                                           "ignore_in_list": True, "hide_ip": True}]},
+        deep,
+    ]
+
+
+def check_round_trip(configs):
+    """
+    每种编码都应解码为与 v1 相同的结果；此前生成的链接应解码为相同的配置；
+    损坏的 v2 字符串应返回 None 而不是抛出异常。
+    """
+    for config in configs:
+        expected = decompress_config(compress_config(config, 1))
+        assert expected is not None
+        for name, version, zdict in CODECS:
+            encoded = _encode(config, version, zdict)
+            assert encoded, f"{name} 编码失败"
+            assert decompress_config(encoded) == expected, f"{name} 往返结果不一致"
+
+    expected = decompress_config(compress_config(make_group_config(4, seed=7), 1))
+    for link in LEGACY_LINKS:
+        assert decompress_config(link) == expected, f"旧链接解码结果不一致: {link[:16]}..."
+
+    encoded = _encode(configs[-1], 2, True)
+    assert decompress_config(encoded[:len(encoded) // 2]) is None
+
+
+def run(configs, repeat):
+    results = []
+    for config in configs:
+        count = _count_servers(config.get("servers", []))
+        for name, version, zdict in CODECS:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encoded = _encode(config, version, zdict)
+            encode_s = (time.perf_counter() - start) / repeat
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                decompress_config(encoded)
+            decode_s = (time.perf_counter() - start) / repeat
+
+            results.append({
+                "servers": count,
+                "codec": name,
+                "length": len(encoded),
+                "encode_us": encode_s * 1e6,
+                "decode_us": decode_s * 1e6,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 80, 300], help="配置中的服务器数量")
+    parser.add_argument("--samples", nargs="+", help="真实或匿名化的样例配置，用于训练并评估预设字典")
+    parser.add_argument("--holdout", type=float, default=0.3, help="留出、不参与字典训练的群组比例")
+    parser.add_argument("--size", type=int, default=1024, help="训练的预设字典的最大字节数")
+    parser.add_argument("--repeat", type=int, default=200, help="每项测量重复的次数（取平均）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    args = parser.parse_args()
+
+    if args.samples:
+        training, configs = split_samples(load_groups(args.samples), args.holdout)
+        # 临时登记训练得到的字典（使用尚未占用的编号），只在本进程内有效
+        config_coder._V2_ZDICTS[max(config_coder._V2_ZDICTS, default=0) + 1] = train(training, args.size)
+        print(f"预设字典由 {len(training)} 个群组训练，在留出的 {len(configs)} 个群组上测量")
+    else:
+        configs = [make_group_config(count) for count in args.sizes]
+    if config_coder._V2_ZDICTS:
+        CODECS.append(ZDICT_CODEC)
+
+    rng = random.Random(1)
+    check_round_trip(_edge_cases() + [make_group_config(rng.randrange(1, 200), depth=rng.randrange(1, 5), seed=seed)
+                                      for seed in range(50)] + configs)
+
+    results = run(configs, args.repeat)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'servers':>7} {'codec':>9} {'length':>7} {'vs v1':>7} {'encode_us':>10} {'decode_us':>10}")
+    for index in range(0, len(results), len(CODECS)):
+        baseline = results[index]["length"]
+        for r in results[index:index + len(CODECS)]:
+            print(f"{r['servers']:>7} {r['codec']:>9} {r['length']:>7} "
+                  f"{r['length'] / baseline:>7.1%} {r['encode_us']:>10.1f} {r['decode_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
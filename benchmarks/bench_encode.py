@@ -0,0 +1,79 @@
+"""
+图片输出编码基准测试：对比各输出格式的编码耗时与输出体积。
+
+用法:
+    python benchmarks/bench_encode.py [--sizes 10 40 150] [--repeat 3] [--json]
+"""
+import argparse
+import json
+import time
+
+from fixtures import init_nonebot, make_server_tree
+
+init_nonebot()
+
+from xducraft_bot.plugins.xducraft_mc_status.image_encoder import encode_image, IMAGE_EXTENSIONS  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.image_renderer import build_page_jobs, paint_status_image  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.layout import build_layout  # noqa: E402
+
+
+def _paint(count: int):
+    """绘制包含 count 个服务器的所有分页图片（图标直接从 data URI 解码）。"""
+    import base64
+
+    rows = build_layout(make_server_tree(count), True)
+    icons = {}
+    for row in rows:
+        src = row["server"].get("favicon")
+        if src:
+            icons[src] = base64.b64decode(src.split(",", 1)[1])
+    return [paint_status_image(job) for job in build_page_jobs(rows, "基准测试页脚", icons)]
+
+
+def run(sizes, repeat):
+    results = []
+    for count in sizes:
+        pages = _paint(count)
+        raw_bytes = sum(img.width * img.height * 4 for img in pages)
+        for output_format in IMAGE_EXTENSIONS:
+            timings = []
+            total_bytes = 0
+            extensions = set()
+            for _ in range(repeat):
+                start = time.perf_counter()
+                encoded = [encode_image(img, output_format) for img in pages]
+                timings.append(time.perf_counter() - start)
+                total_bytes = sum(len(data) for data, _ in encoded)
+                extensions = {extension for _, extension in encoded}
+            results.append({
+                "servers": count,
+                "pages": len(pages),
+                "height": sum(img.height for img in pages),
+                "format": output_format if extensions == {IMAGE_EXTENSIONS[output_format]} else f"{output_format}->png",
+                "encode_ms": min(timings) * 1000,
+                "bytes": total_bytes,
+                "ratio": total_bytes / raw_bytes,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 40, 150], help="每张图片中的服务器数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每种格式重复编码的次数（取最快一次）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'servers':>7} {'pages':>5} {'height':>7} {'format':<20} {'encode_ms':>10} {'bytes':>10} {'ratio':>7}")
+    for r in results:
+        print(f"{r['servers']:>7} {r['pages']:>5} {r['height']:>7} {r['format']:<20} {r['encode_ms']:>10.1f} "
+              f"{r['bytes']:>10} {r['ratio']:>7.2%}")
+
+
+if __name__ == "__main__":
+    main()
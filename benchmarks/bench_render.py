@@ -0,0 +1,170 @@
+"""
+渲染流水线基准测试：分别测量 render_status_image 各阶段的耗时与内存峰值。
+
+阶段:
+    layout       build_layout（过滤、排序、去除匿名玩家、计算行位置与连接线）
+    icon_fetch   获取图标数据（fixtures 生成的是 data URI，因此只包含 Base64 解码）
+    icon_decode  将图标解码并缩放为精灵图
+    draw         绘制各页图片（服务器行、文字、连接线、标题栏与页脚）
+    encode       按 IMAGE_OUTPUT_FORMAT 编码各页图片
+
+默认每次重复前都会清空所有渲染缓存（冷启动），使用 --warm 可测量缓存命中时的耗时。
+内存峰值使用 tracemalloc 统计 Python 层的分配（不包含 Pillow 内部的图像缓冲区），
+另外报告整个进程的最大常驻内存 (max_rss)。
+
+使用 --json 输出的结果包含当前提交与运行环境，可以保存下来与其他提交的结果对比。
+
+用法:
+    python benchmarks/bench_render.py [--sizes 10 40 150] [--depth 3] [--motd-runs 0] [--icons 32]
+                                      [--repeat 3] [--warm] [--json] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from fixtures import REPO_ROOT, init_nonebot, make_server_tree
+
+init_nonebot()
+
+import PIL  # noqa: E402
+
+from xducraft_bot.plugins.xducraft_mc_status import constants  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.fonts import FONT_SPECS  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.image_encoder import encode_image  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.image_renderer import (  # noqa: E402
+    _prefetch_icons, build_page_jobs, clear_render_caches, paint_status_image)
+from xducraft_bot.plugins.xducraft_mc_status.layout import build_layout  # noqa: E402
+from xducraft_bot.plugins.xducraft_mc_status.sprite_cache import get_icon_sprite  # noqa: E402
+
+STAGES = ("layout", "icon_fetch", "icon_decode", "draw", "encode")
+
+
+class _StageTimer:
+    """记录每个阶段的耗时与 tracemalloc 内存峰值。"""
+
+    def __init__(self):
+        self.timings = {stage: [] for stage in STAGES}
+        self.peaks = {stage: 0 for stage in STAGES}
+
+    def run(self, stage, func, *args):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args)
+        self.timings[stage].append(time.perf_counter() - start)
+        self.peaks[stage] = max(self.peaks[stage], tracemalloc.get_traced_memory()[1] - baseline)
+        return result
+
+
+def _render_once(tree, timer: _StageTimer):
+    rows = timer.run("layout", build_layout, tree, True)
+    icons = timer.run("icon_fetch", asyncio.run, _prefetch_icons(rows))
+    timer.run("icon_decode", lambda: [get_icon_sprite(data) for data in icons.values()])
+    jobs = build_page_jobs(rows, "基准测试页脚", icons)
+    pages = timer.run("draw", lambda: [paint_status_image(job) for job in jobs])
+    encoded = timer.run("encode", lambda: [encode_image(page) for page in pages])
+    return len(rows), pages, encoded
+
+
+def run(sizes, depth, motd_runs, icon_count, repeat, warm):
+    results = []
+    tracemalloc.start()
+    for count in sizes:
+        tree = make_server_tree(count, depth=depth, icon_count=icon_count, motd_runs=motd_runs)
+        timer = _StageTimer()
+        clear_render_caches()
+        for _ in range(repeat):
+            if not warm:
+                clear_render_caches()
+            row_count, pages, encoded = _render_once(tree, timer)
+
+        stages = {
+            stage: {
+                "min_ms": min(timer.timings[stage]) * 1000,
+                "median_ms": statistics.median(timer.timings[stage]) * 1000,
+                "peak_kb": timer.peaks[stage] / 1024,
+            }
+            for stage in STAGES
+        }
+        results.append({
+            "servers": count,
+            "rows": row_count,
+            "pages": len(pages),
+            "height": sum(page.height for page in pages),
+            "bytes": sum(len(data) for data, _ in encoded),
+            "total_ms": sum(stage["median_ms"] for stage in stages.values()),
+            "stages": stages,
+        })
+    tracemalloc.stop()
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=REPO_ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _environment(args) -> dict:
+    fonts_dir = REPO_ROOT / "xducraft_bot" / "plugins" / "xducraft_mc_status" / "resources" / "fonts"
+    font_files = {font_file for font_file, _ in FONT_SPECS.values()}
+    return {
+        "commit": _git_revision(),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "fonts": "bundled" if all((fonts_dir / name).exists() for name in font_files) else "fallback",
+        "output_format": constants.IMAGE_OUTPUT_FORMAT,
+        "depth": args.depth,
+        "motd_runs": args.motd_runs,
+        "icons": args.icons,
+        "repeat": args.repeat,
+        "warm": args.warm,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 40, 150], help="服务器数量")
+    parser.add_argument("--depth", type=int, default=3, help="服务器树的最大深度")
+    parser.add_argument("--motd-runs", type=int, default=0, help="每个 MOTD 额外追加的颜色段数量")
+    parser.add_argument("--icons", type=int, default=32, help="不重复的图标数量（0 表示没有图标）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种规模重复渲染的次数")
+    parser.add_argument("--warm", action="store_true", help="重复渲染之间保留缓存")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    parser.add_argument("--output", help="将 JSON 结果写入文件")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.depth, args.motd_runs, args.icons, args.repeat, args.warm)
+    report = {
+        "environment": _environment(args),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"commit {report['environment']['commit']}, fonts {report['environment']['fonts']}, "
+          f"max_rss {report['max_rss_mb']:.1f} MB")
+    print(f"{'servers':>7} {'pages':>5} {'stage':<12} {'min_ms':>10} {'median_ms':>10} {'peak_kb':>10}")
+    for r in results:
+        for stage, s in r["stages"].items():
+            print(f"{r['servers']:>7} {r['pages']:>5} {stage:<12} {s['min_ms']:>10.1f} {s['median_ms']:>10.1f} "
+                  f"{s['peak_kb']:>10.1f}")
+        print(f"{r['servers']:>7} {r['pages']:>5} {'total':<12} {'':>10} {r['total_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+插件启动耗时基准测试：在全新的解释器中测量导入插件包的耗时，以及首次加载全部字体的耗时。
+
+每次测量都启动一个新的子进程，避免模块缓存影响结果。
+传入 --baseline 时，会用 git archive 将指定版本的代码导出到临时目录，在同样的条件下测量并与当前代码对比。
+
+参考结果（字体文件缺失、使用默认字体的单核环境，--repeat 9）：
+    以字体延迟加载之前的版本（--baseline 83ebf05^）为基准，导入耗时中位数约 164ms -> 140ms（85%），
+    导入加首次加载字体约 164ms -> 144ms（87%）；安装了中文字体时，旧版本在导入时加载全部字体，差距更大。
+
+用法:
+    python benchmarks/bench_startup.py [--repeat 5] [--baseline 83ebf05^] [--json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+
+from fixtures import REPO_ROOT
+
+# 在子进程中执行的测量脚本，输出 JSON 格式的耗时（秒）
+# 被测代码的目录放在 sys.path 最前面（init_nonebot 会把当前仓库加入 sys.path），保证导入的是被测版本
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {bench!r})
+from fixtures import init_nonebot
+init_nonebot()
+sys.path.insert(0, {root!r})
+
+start = time.perf_counter()
+import xducraft_bot.plugins.xducraft_mc_status as plugin
+import_time = time.perf_counter() - start
+assert plugin.__file__.startswith({root!r}), plugin.__file__
+
+start = time.perf_counter()
+try:
+    from xducraft_bot.plugins.xducraft_mc_status.fonts import preload_fonts
+    preload_fonts()
+except ImportError:
+    pass  # 旧版本在导入时就已加载字体
+font_time = time.perf_counter() - start
+
+print(json.dumps({{"import": import_time, "fonts": font_time}}))
+"""
+
+
+def _probe_once(root):
+    script = _PROBE.format(root=str(root), bench=str(REPO_ROOT / "benchmarks"))
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=root)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _export_revision(revision, directory):
+    """用 git archive 将指定版本的代码导出到 directory（不改动当前工作区）。"""
+    archive = subprocess.run(["git", "archive", "--format=tar", revision], capture_output=True, check=True,
+                             cwd=REPO_ROOT).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def run(repeat, baseline=None):
+    """测量当前代码（以及 baseline 版本）的启动耗时；两者交替测量，减少机器负载变化带来的偏差。"""
+    targets = [("HEAD", REPO_ROOT)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if baseline:
+            _export_revision(baseline, temp_dir)
+            targets.insert(0, (baseline, temp_dir))
+        samples = {name: [] for name, _ in targets}
+        for _ in range(repeat):
+            for name, root in targets:
+                samples[name].append(_probe_once(root))
+
+    results = []
+    for name, _ in targets:
+        results.extend(_summarize(name, samples[name]))
+    return results
+
+
+def _summarize(version, samples):
+    results = []
+    for stage in ("import", "fonts", "total"):
+        # 旧版本在导入时就加载了字体，只有 total（导入 + 首次加载字体）在两个版本之间可以直接比较
+        timings = [(sample["import"] + sample["fonts"] if stage == "total" else sample[stage]) * 1000
+                   for sample in samples]
+        results.append({
+            "version": version,
+            "stage": stage,
+            "min_ms": min(timings),
+            "median_ms": statistics.median(timings),
+            "max_ms": max(timings),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="启动子进程测量的次数")
+    parser.add_argument("--baseline", help="作为对比基准的 git 版本（如 83ebf05^ 或某个标签）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.baseline)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    baseline = {r["stage"]: r["median_ms"] for r in results if args.baseline and r["version"] == args.baseline}
+    print(f"{'version':<12} {'stage':<8} {'min_ms':>10} {'median_ms':>10} {'max_ms':>10} {'vs base':>8}")
+    for r in results:
+        change = f"{r['median_ms'] / baseline[r['stage']]:>8.1%}" if baseline.get(r["stage"], 0) >= 1 else f"{'':>8}"
+        print(f"{r['version']:<12} {r['stage']:<8} {r['min_ms']:>10.1f} {r['median_ms']:>10.1f} "
+              f"{r['max_ms']:>10.1f} {change}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+基准测试共用的工具：初始化 NoneBot 环境，以及生成模拟的服务器状态树。
+
+插件包在导入时会注册 NoneBot 命令，因此必须先调用 init_nonebot() 再导入插件模块。
+"""
+import base64
+import random
+import sys
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def init_nonebot():
+    """初始化一个最小的 NoneBot 环境，使插件模块可以被导入。"""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    import nonebot
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init()
+
+
+def make_favicon(rng: random.Random, size: int = 64) -> str:
+    """生成一个带随机像素块的 64x64 PNG 图标，返回 data URI。"""
+    from PIL import Image
+
+    img = Image.new("RGBA", (size, size))
+    block = 8
+    for bx in range(0, size, block):
+        for by in range(0, size, block):
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255)
+            img.paste(color, (bx, by, bx + block, by + block))
+    output = BytesIO()
+    img.save(output, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+
+
+_MOTD_COLORS = ["red", "gold", "yellow", "green", "aqua", "blue", "light_purple", "gray"]
+
+
+def _make_motd(rng: random.Random, index: int, extra_runs: int = 0) -> Dict[str, str]:
+    """
+    生成一个带颜色码的 MOTD，交替使用 HTML 与 § 两种格式。
+    extra_runs 为额外追加的颜色段数量，用于模拟更复杂的 MOTD。
+    """
+    words = [rng.choice(["原版", "模组", "小游戏", "Survival", "Creative"]) for _ in range(extra_runs)]
+    if index % 2:
+        extra = "".join(f'<font color="{rng.choice(_MOTD_COLORS)}"> {word}</font>' for word in words)
+        return {"html": f'<font color="gold">XDU</font><font color="aqua">Craft §l#{index}</font>{extra}'
+                        f'<br><font color="gray">欢迎来到第 {index} 号服务器</font>'}
+    extra = "".join(f" §{rng.choice('0123456789abcdef')}{word}" for word in words)
+    return {"text": f"§aXDUCraft §b生存服 §e#{index} §7| §f{rng.choice(['原版', '模组', '小游戏'])}{extra}"}
+
+
+def _make_server(rng: random.Random, index: int, favicon: str, motd_runs: int = 0) -> Dict[str, Any]:
+    """生成一个已合并状态数据的服务器节点（与 get_all_servers_status 的输出结构一致）。"""
+    online = rng.random() > 0.15
+    player_count = rng.randrange(0, 6) if online else 0
+    return {
+        "ip": f"s{index}.mc.example.com",
+        "online": online,
+        "ping": rng.randrange(5, 200),
+        "tag": rng.choice(["", "生存", "创造", "模组"]),
+        "tag_color": rng.choice(["", "FF5555", "55AA55", "5555FF"]),
+        "comment": "",
+        "favicon": favicon,
+        "description": _make_motd(rng, index, motd_runs),
+        "version": {"name": "1.20.4"},
+        "players": {
+            "online": player_count,
+            "max": 20,
+            "sample": [{"name": f"Player{index}_{j}", "id": f"{index:08d}-0000-0000-0000-{j:012d}"}
+                       for j in range(player_count)],
+        },
+        "children": [],
+    }
+
+
+def make_server_tree(count: int, depth: int = 2, seed: int = 0, icon_count: int = 32,
+                     motd_runs: int = 0) -> List[Dict[str, Any]]:
+    """
+    生成包含 count 个服务器的状态树。
+
+    Args:
+        count: 服务器总数。
+        depth: 树的最大深度（1 表示没有子服）。
+        seed: 随机种子，相同参数总是生成相同的树。
+        icon_count: 不重复的图标数量（0 表示所有服务器都没有图标）。
+        motd_runs: 每个 MOTD 额外追加的颜色段数量。
+    """
+    rng = random.Random(seed)
+    favicons = [make_favicon(rng) for _ in range(min(count, icon_count))]
+
+    tree: List[Dict[str, Any]] = []
+    parents: List[List[Dict[str, Any]]] = [tree]
+    for index in range(count):
+        favicon = favicons[index % len(favicons)] if favicons else ""
+        server = _make_server(rng, index, favicon, motd_runs)
+        level = rng.randrange(min(depth, len(parents)))
+        parents[level].append(server)
+        del parents[level + 1:]
+        parents.append(server["children"])
+    return tree
+
+
+def make_group_config(count: int, depth: int = 2, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成包含 count 个服务器的群组配置（与 export_group_data 的输出结构一致），用于配置编码的基准测试。
+    标签、颜色与域名后缀从少量取值中选取，与真实配置中大量重复的情况相近。
+    """
+    rng = random.Random(seed)
+    tree: List[Dict[str, Any]] = []
+    parents: List[List[Dict[str, Any]]] = [tree]
+    for index in range(count):
+        server = {
+            "ip": f"{rng.choice(['mc', 'play', 's', 'hub'])}{index}.{rng.choice(['xducraft.com', 'mc.example.com', 'xidian.edu.cn'])}"
+                  + rng.choice(["", ":25565", f":{rng.randrange(20000, 30000)}"]),
+            "comment": rng.choice(["", "", "主服", "每周五维护", "需要白名单"]),
+            "tag": rng.choice(["", "生存", "创造", "模组", "小游戏"]),
+            "tag_color": rng.choice(["", "FF5555", "55AA55", "5555FF", "FFAA00"]),
+            "ignore_in_list": rng.random() < 0.1,
+            "hide_ip": rng.random() < 0.2,
+            "display_name": rng.choice(["", "", f"XDUCraft #{index}"]),
+            "children": [],
+        }
+        level = rng.randrange(min(depth, len(parents)))
+        parents[level].append(server)
+        del parents[level + 1:]
+        parents.append(server["children"])
+    return {"footer": "数据每分钟刷新 | XDUCraft", "servers": tree}
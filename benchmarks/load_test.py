@@ -0,0 +1,345 @@
+"""
+端到端压力测试：模拟多个群同时发送 /mcs 命令，测量插件在高峰期的表现。
+
+命令通过 NoneBot 的事件分发 (handle_event) 进入 handle_entry，与真实运行时的路径一致。
+外部依赖全部替换为本地的替身:
+    - 服务器状态API：在独立线程中运行的本地 HTTP 服务，可配置延迟、错误率与图标
+    - OneBot Bot：不连接任何协议端，只记录插件调用的 API（发送消息等）
+    - 数据文件与图片缓存目录：使用临时目录，不会影响真实数据
+
+命令按泊松过程到达（开环负载），报告命令延迟的 p50/p99、吞吐量与事件循环延迟。
+
+用法:
+    python benchmarks/load_test.py [--groups 20] [--servers 12] [--rate 5] [--duration 30]
+                                   [--api-latency 0.2] [--api-jitter 0.1] [--error-rate 0.02]
+                                   [--favicons data] [--json]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+from fixtures import init_nonebot, make_favicon, make_server_tree
+
+init_nonebot()
+
+import nonebot  # noqa: E402
+from nonebot.adapters.onebot.v11 import Adapter, Bot, GroupMessageEvent, Message  # noqa: E402
+from nonebot.adapters.onebot.v11.event import Sender  # noqa: E402
+from nonebot.log import logger  # noqa: E402
+from nonebot.message import handle_event  # noqa: E402
+
+PLUGIN = "xducraft_bot.plugins.xducraft_mc_status"
+
+
+# --- 状态API替身 ---
+
+class StubStatusAPI:
+    """
+    模拟 mc.sjtu.cn 服务器状态API的本地 HTTP 服务（运行在独立线程的事件循环中，不占用被测的事件循环）。
+    每个地址的返回内容由地址确定，因此同一服务器在多次查询中保持一致。
+    """
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, favicon_mode: str, icon_count: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.favicon_mode = favicon_mode
+        rng = random.Random(0)
+        self.icons = [base64.b64decode(make_favicon(rng).split(",", 1)[1]) for _ in range(max(icon_count, 1))]
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stub-status-api", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        server.close()
+
+    def _status_for(self, ip: str) -> Dict[str, Any]:
+        rng = random.Random(ip)
+        index = rng.randrange(len(self.icons))
+        online = rng.random() > 0.15
+        player_count = rng.randrange(0, 6) if online else 0
+        status = {
+            "online": online,
+            "hostname": ip,
+            "port": 25565,
+            "ping": rng.randrange(5, 200),
+            "version": {"name": "1.20.4"},
+            "description": {"text": f"§aXDUCraft §b{ip} §7| §f{rng.choice(['原版', '模组', '小游戏'])}"},
+            "players": {
+                "online": player_count,
+                "max": 20,
+                "sample": [{"name": f"Player{j}", "id": f"{index:08d}-0000-0000-0000-{j:012d}"}
+                           for j in range(player_count)],
+            },
+        }
+        if self.favicon_mode == "data":
+            status["favicon"] = "data:image/png;base64," + base64.b64encode(self.icons[index]).decode("ascii")
+        elif self.favicon_mode == "url":
+            status["favicon"] = f"{self.base_url}/favicon/{index}.png"
+        return status
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            path = request_line.split(" ")[1] if " " in request_line else "/"
+            self.requests += 1
+            extra_headers = ""
+
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+            if random.random() < self.error_rate:
+                self.errors += 1
+                status_line, content_type, body = "500 Internal Server Error", "text/plain", b"error"
+            elif path.startswith("/favicon/"):
+                # 图标带有 ETag，支持条件请求（内容未变化时返回 304）
+                index = int(Path(urlsplit(path).path).stem) % len(self.icons)
+                extra_headers = f'ETag: "{index}"\r\n'
+                if headers.get("if-none-match") == f'"{index}"':
+                    self.not_modified += 1
+                    status_line, content_type, body = "304 Not Modified", "image/png", b""
+                else:
+                    status_line, content_type, body = "200 OK", "image/png", self.icons[index]
+            else:
+                ip = parse_qs(urlsplit(path).query).get("query", [""])[0]
+                status_line, content_type = "200 OK", "application/json"
+                body = json.dumps(self._status_for(ip)).encode("utf-8")
+
+            writer.write(f"HTTP/1.1 {status_line}\r\nContent-Type: {content_type}\r\n{extra_headers}"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# --- OneBot Bot 替身 ---
+
+class RecordingBot(Bot):
+    """不连接协议端的 Bot，记录每次 API 调用并立即返回成功。"""
+
+    def __init__(self, adapter: Adapter, self_id: str):
+        super().__init__(adapter, self_id)
+        self.calls: List[Dict[str, Any]] = []
+        self._message_id = 0
+
+    async def call_api(self, api: str, **data: Any) -> Any:
+        self._message_id += 1
+        message = Message(data.get("message") or [])
+        # 合并转发消息的每个节点都带有自己的消息内容
+        for node in data.get("messages") or []:
+            message += Message(node["data"]["content"])
+        self.calls.append({
+            "api": api,
+            "group_id": data.get("group_id"),
+            "text": message.extract_plain_text(),
+            "images": sum(1 for segment in message if segment.type == "image"),
+        })
+        return {"message_id": self._message_id}
+
+
+def _make_event(group_id: int, user_id: int, text: str, message_id: int) -> GroupMessageEvent:
+    message = Message(text)
+    return GroupMessageEvent(
+        time=int(time.time()),
+        self_id=10000,
+        post_type="message",
+        sub_type="normal",
+        user_id=user_id,
+        message_type="group",
+        message_id=message_id,
+        message=message,
+        original_message=message,
+        raw_message=text,
+        font=0,
+        sender=Sender(user_id=user_id, nickname=f"user{user_id}", role="member"),
+        to_me=False,
+        group_id=group_id,
+    )
+
+
+# --- 测试环境 ---
+
+def _server_config(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """只保留服务器树中的配置字段（状态由替身API提供）。"""
+    return [{
+        "ip": node["ip"],
+        "tag": node["tag"],
+        "tag_color": node["tag_color"],
+        "comment": "",
+        "priority": 100,
+        "children": _server_config(node["children"]),
+    } for node in nodes]
+
+
+def _setup_plugin(work_dir: Path, api: StubStatusAPI, groups: int, servers: int):
+    """加载插件，并将其数据文件、图片缓存与状态API指向测试环境。"""
+    nonebot.load_plugin(PLUGIN)
+    from xducraft_bot.plugins.xducraft_mc_status import data_manager, disk_cache, status_fetcher
+
+    data_manager.DATA_DIR = str(work_dir)
+    data_manager.DATA_FILE = str(work_dir / "server_data.json")
+    disk_cache.CACHE_DIR = work_dir / "image_cache"
+    status_fetcher.STATUS_API_URL = f"{api.base_url}/custom/serverlist/"
+
+    data = {
+        str(group_id): {
+            "servers": _server_config(make_server_tree(servers, seed=group_id)),
+            "footer": f"压力测试群 {group_id}",
+            "show_offline_by_default": False,
+        }
+        for group_id in range(1, groups + 1)
+    }
+    with open(data_manager.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+async def _monitor_loop_lag(interval: float, samples: List[float], stop: asyncio.Event):
+    """周期性地休眠 interval 秒，记录实际唤醒时间比预期晚了多少（即事件循环延迟）。"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+async def run_load(bot: RecordingBot, groups: int, rate: float, duration: float, single_ratio: float,
+                   seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    failures = 0
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor_loop_lag(0.01, lag_samples, stop))
+
+    async def _command(event: GroupMessageEvent):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await handle_event(bot, event)
+        except Exception as e:
+            failures += 1
+            print(f"命令处理异常: {e}")
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    started = time.perf_counter()
+    message_id = 0
+    while time.perf_counter() - started < duration:
+        message_id += 1
+        group_id = rng.randrange(1, groups + 1)
+        text = f"/mcs s{rng.randrange(5)}.mc.example.com" if rng.random() < single_ratio else "/mcs"
+        tasks.append(asyncio.create_task(_command(_make_event(group_id, 20000 + message_id, text, message_id))))
+        await asyncio.sleep(rng.expovariate(rate))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    error_replies = sum(1 for call in bot.calls if "失败" in call["text"])
+    images = sum(call["images"] for call in bot.calls)
+    return {
+        "commands": len(latencies),
+        "failures": failures,
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": _percentile(latencies, 50) * 1000,
+        "latency_p99_ms": _percentile(latencies, 99) * 1000,
+        "latency_max_ms": max(latencies, default=0.0) * 1000,
+        "loop_lag_p50_ms": _percentile(lag_samples, 50) * 1000,
+        "loop_lag_p99_ms": _percentile(lag_samples, 99) * 1000,
+        "loop_lag_max_ms": max(lag_samples, default=0.0) * 1000,
+        "api_calls": len(bot.calls),
+        "images_sent": images,
+        "error_replies": error_replies,
+    }
+
+
+def main():
+    # 每条命令都会产生几行 NoneBot 日志，压测时只保留警告与错误
+    logger.configure(extra={"nonebot_log_level": "WARNING"})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=20, help="模拟的群数量")
+    parser.add_argument("--servers", type=int, default=12, help="每个群配置的服务器数量")
+    parser.add_argument("--rate", type=float, default=5.0, help="平均每秒到达的命令数")
+    parser.add_argument("--duration", type=float, default=30.0, help="发送命令的持续时间（秒）")
+    parser.add_argument("--single-ratio", type=float, default=0.2, help="单服务器查询 (/mcs <IP>) 所占的比例")
+    parser.add_argument("--api-latency", type=float, default=0.2, help="状态API的平均延迟（秒）")
+    parser.add_argument("--api-jitter", type=float, default=0.1, help="状态API延迟的随机抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="状态API返回 500 错误的概率")
+    parser.add_argument("--favicons", choices=["none", "data", "url"], default="data",
+                        help="图标形式：无图标 / data URI / 需要下载的 URL")
+    parser.add_argument("--icons", type=int, default=16, help="不重复的图标数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    args = parser.parse_args()
+
+    api = StubStatusAPI(args.api_latency, args.api_jitter, args.error_rate, args.favicons, args.icons)
+    api.start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="mcs-load-") as work_dir:
+            _setup_plugin(Path(work_dir), api, args.groups, args.servers)
+            bot = RecordingBot(Adapter(nonebot.get_driver()), "10000")
+            result = asyncio.run(run_load(bot, args.groups, args.rate, args.duration, args.single_ratio, args.seed))
+    finally:
+        api.stop()
+
+    result.update({"stub_api_requests": api.requests, "stub_api_errors": api.errors,
+                   "stub_api_not_modified": api.not_modified})
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    print(f"commands {result['commands']} in {result['elapsed_s']:.1f}s "
+          f"({result['throughput_per_s']:.2f}/s), failures {result['failures']}, "
+          f"error replies {result['error_replies']}")
+    print(f"latency   p50 {result['latency_p50_ms']:8.1f} ms  p99 {result['latency_p99_ms']:8.1f} ms  "
+          f"max {result['latency_max_ms']:8.1f} ms")
+    print(f"loop lag  p50 {result['loop_lag_p50_ms']:8.1f} ms  p99 {result['loop_lag_p99_ms']:8.1f} ms  "
+          f"max {result['loop_lag_max_ms']:8.1f} ms")
+    print(f"bot API calls {result['api_calls']} ({result['images_sent']} images), stub API requests {result['stub_api_requests']} "
+          f"({result['stub_api_errors']} errors, {result['stub_api_not_modified']} not modified)")
+
+
+if __name__ == "__main__":
+    main()
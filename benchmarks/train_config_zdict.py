@@ -0,0 +1,114 @@
+"""
+训练 v2 配置编码使用的 zlib 预设字典（zdict）。
+
+从样例配置中提取常见的片段（域名前后缀、端口、标签、颜色、备注等），按出现在多少个群组中与片段长度打分，
+得分最高的片段放在字典末尾（deflate 引用距离越近编码越短），输出可以粘贴到 config_coder.py 的 bytes 字面量。
+只出现在一个群组中的片段对其他配置没有帮助，不会放入字典（只有一个群组时除外）。
+
+样例可以是机器人的 server_data.json（群号 -> 群组配置）、/mcs export_json 导出的单个群组配置，或由它们组成的列表；
+服务器既可以是嵌套的 children 树，也可以是带 parent_ip 的扁平列表（如 data/server_data.json.example），
+整行的 // 注释与对象末尾多余的逗号会被忽略。
+训练结果需先用 bench_config_codec.py --samples 在未参与训练的配置上验证确有收益，再在 config_coder._V2_ZDICTS 中登记。
+
+用法:
+    python benchmarks/train_config_zdict.py --samples data/server_data.json [export.json ...] [--size 1024]
+"""
+import argparse
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+
+def _read_json(path: str) -> Any:
+    """读取 JSON 文件；解析失败时去掉整行的 // 注释与末尾多余的逗号后重试（示例配置带有注释）。"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        text = re.sub(r"^\s*//.*$", "", text, flags=re.MULTILINE)
+        return json.loads(re.sub(r",(\s*[}\]])", r"\1", text))
+
+
+def _as_tree(servers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """将带 parent_ip 的扁平服务器列表转换为 children 树（与 config_coder._build_tree 一致）；已是树形时原样返回。"""
+    if not any(server.get("parent_ip") for server in servers):
+        return servers
+    server_map = {server["ip"]: {**server, "children": []} for server in servers}
+    tree = []
+    for server in server_map.values():
+        parent = server_map.get(server.get("parent_ip") or "")
+        (parent["children"] if parent else tree).append(server)
+    return tree
+
+
+def load_groups(paths: List[str]) -> List[Dict[str, Any]]:
+    """读取样例文件，返回其中所有的群组配置（服务器统一为 children 树，与 export_group_data 的输出结构一致）。"""
+    groups = []
+    for path in paths:
+        data = _read_json(path)
+        if isinstance(data, dict):
+            data = [data] if "servers" in data else list(data.values())
+        for group in data:
+            groups.append({"footer": group.get("footer") or "", "servers": _as_tree(group.get("servers") or [])})
+    return groups
+
+
+def _walk_servers(servers: List[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """前序遍历服务器树（与 config_coder 序列化的顺序一致），逐个返回各层的服务器。"""
+    for server in servers:
+        yield server
+        yield from _walk_servers(server.get("children") or [])
+
+
+def _fragments(server: Dict[str, Any]) -> Iterable[str]:
+    """从一个服务器配置中提取可能在其他配置中重复出现的片段。"""
+    ip = server.get("ip") or ""
+    host, _, port = ip.partition(":")
+    if port:
+        yield ":" + port
+    labels = host.split(".")
+    if len(labels) > 1:
+        yield labels[0] + "."
+        for index in range(1, len(labels)):
+            yield "." + ".".join(labels[index:])
+    for field in ("tag", "tag_color", "comment", "display_name"):
+        if server.get(field):
+            yield server[field]
+
+
+def train(groups: List[Dict[str, Any]], size: int) -> bytes:
+    # 每个群组只计一次，避免单个大配置内部的重复（deflate 本身就能处理）主导字典
+    counts = Counter()
+    for group in groups:
+        counts.update({fragment for server in _walk_servers(group["servers"]) for fragment in _fragments(server)})
+    min_groups = min(2, len(groups))
+    # 得分 = 出现的群组数 × 长度；从高到低选取片段直到达到字典大小，再按得分从低到高排列
+    ranked = sorted((fragment for fragment in counts if counts[fragment] >= min_groups),
+                    key=lambda fragment: (counts[fragment] * len(fragment.encode("utf-8")), fragment), reverse=True)
+    chosen, total = [], 0
+    for fragment in ranked:
+        encoded = fragment.encode("utf-8")
+        if total + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", nargs="+", required=True, help="用于训练的 server_data.json 或导出的配置文件")
+    parser.add_argument("--size", type=int, default=1024, help="字典的最大字节数")
+    args = parser.parse_args()
+
+    groups = load_groups(args.samples)
+    zdict = train(groups, args.size)
+    print(f"# {len(zdict)} bytes, trained on {len(groups)} groups")
+    for start in range(0, len(zdict), 64):
+        print(f"    {zdict[start:start + 64]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+测试共用的配置：插件包在导入时会注册 NoneBot 命令，因此在收集测试模块之前先初始化 NoneBot。
+"""
+import nonebot
+import pytest
+
+nonebot.init()
+
+from xducraft_bot.plugins.xducraft_mc_status import disk_cache  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """将图片磁盘缓存指向临时目录，并在前后关闭数据文件、清空索引。"""
+    disk_cache.close_cache()
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", tmp_path)
+    with disk_cache._lock:
+        disk_cache._index_clear()
+    yield tmp_path
+    disk_cache.close_cache()
+    with disk_cache._lock:
+        disk_cache._index_clear()
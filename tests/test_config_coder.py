@@ -0,0 +1,178 @@
+import base64
+import json
+import os
+import zlib
+
+import pytest
+
+from benchmarks.train_config_zdict import load_groups, train
+from xducraft_bot.plugins.xducraft_mc_status import config_coder
+from xducraft_bot.plugins.xducraft_mc_status.config_coder import (
+    compress_config, decompress_config, V2_PREFIX, V2_HEADER_DEFLATE, V2_HEADER_SHOW_OFFLINE, V2_HEADER_ZDICT,
+)
+
+
+def _server(ip, children=(), **fields):
+    return {
+        'ip': ip,
+        'comment': fields.get('comment', ""),
+        'tag': fields.get('tag', ""),
+        'tag_color': fields.get('tag_color', ""),
+        'ignore_in_list': fields.get('ignore_in_list', False),
+        'hide_ip': fields.get('hide_ip', False),
+        'display_name': fields.get('display_name', ""),
+        'children': list(children),
+    }
+
+
+GROUP = {
+    'footer': "页脚 | XDUCraft",
+    'servers': [
+        _server("hub.example.com", tag="大厅", tag_color="3181d0", children=[
+            _server("survival.example.com:25566", tag="生存", tag_color="da3c8f", comment="每周五维护", children=[
+                _server("s1.survival.example.com", tag="生存", tag_color="da3c8f", hide_ip=True),
+            ]),
+            _server("mini.example.com", tag="小游戏", tag_color="#ABCDEF", display_name="§a小游戏服"),
+        ]),
+        _server("modpack.independent.net:25570", tag="模组", tag_color="dd6d1e", ignore_in_list=True),
+    ],
+}
+
+EXPECTED = {'footer': GROUP['footer'], 'show_offline_by_default': False, 'servers': GROUP['servers']}
+
+# 由 v1 编码器生成的链接（benchmarks/fixtures.make_group_config(4, seed=7)），新版本必须仍能解码
+LEGACY_V1_LINK = (
+    "eNptj9GKwyAQRX8luK8io2bGpG-hJX-wUEjykBgDhaYtbYUU9uM7tllYdlfhouPcM9dGtJHQAaulwDr4qY1ogNpY5uXrbF3qGSD7yva7z-21n-"
+    "5CgmwacQO1jNGnivLneWMopyK9gRR1XVUAQup0-fZlH1yBTjZi9vqXF5EweTmRQ50mD7jC9E-CXgmXY_8wajmMh_6kwhiVP4lkLh3wd4qy0AwiNz"
+    "Ioh6QW8dWAHphOwRasBiYuIq-6_hPWrKNuVs1ehaWfL8fwTmss2TXtv7yqQnyH59113RMOXGPu"
+)
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(config_coder.__file__), "data", "server_data.json.example")
+
+
+def _v2_link(header: int, body: bytes) -> str:
+    raw = base64.b64encode(bytes([header]) + body)
+    return V2_PREFIX + raw.replace(b'+', b'-').replace(b'/', b'_').rstrip(b'=').decode('ascii')
+
+
+def _v2_body() -> bytes:
+    """GROUP 的 v2 正文（未压缩）。"""
+    raw = base64.b64decode(config_coder._from_url_safe_base64(compress_config(GROUP, 2)[len(V2_PREFIX):]))
+    header, body = raw[0], raw[1:]
+    if header & config_coder.V2_HEADER_ZDICT:
+        decompressor = zlib.decompressobj(-15, zdict=config_coder._V2_ZDICTS[body[0]])
+        return decompressor.decompress(body[1:]) + decompressor.flush()
+    return zlib.decompress(body, -15) if header & V2_HEADER_DEFLATE else body
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_round_trip(version):
+    encoded = compress_config(GROUP, version)
+    assert encoded.startswith(V2_PREFIX) == (version == 2)
+    assert decompress_config(encoded) == EXPECTED
+
+
+def test_v2_is_shorter_than_v1():
+    assert len(compress_config(GROUP, 2)) < len(compress_config(GROUP, 1))
+
+
+def test_default_version_is_v1():
+    assert not compress_config(GROUP).startswith(V2_PREFIX)
+
+
+def test_round_trip_empty_config():
+    for version in (1, 2):
+        assert decompress_config(compress_config({}, version)) == {
+            'footer': "", 'show_offline_by_default': False, 'servers': []}
+
+
+def test_v2_show_offline_flag():
+    link = _v2_link(V2_HEADER_SHOW_OFFLINE, _v2_body())
+    assert decompress_config(link) == {**EXPECTED, 'show_offline_by_default': True}
+
+
+def test_legacy_v1_link_still_decodes():
+    decoded = decompress_config(LEGACY_V1_LINK)
+    assert decoded is not None
+    assert decoded['footer'] == "数据每分钟刷新 | XDUCraft"
+    assert len(decoded['servers']) > 0
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_truncated_input_returns_none(version):
+    encoded = compress_config(GROUP, version)
+    assert decompress_config(encoded[:len(encoded) // 2]) is None
+
+
+def test_corrupted_v2_body_returns_none():
+    body = bytearray(_v2_body())
+    body[len(body) // 2] ^= 0xFF
+    body += b"\x00"
+    assert decompress_config(_v2_link(0, bytes(body))) is None
+
+
+@pytest.mark.parametrize("encoded", [
+    "",
+    V2_PREFIX,
+    "3~AAAA",
+    "not base64 at all!",
+    _v2_link(0x80, b""),
+])
+def test_invalid_input_returns_none(encoded):
+    assert decompress_config(encoded) is None
+
+
+def test_unknown_header_flag_returns_none():
+    assert decompress_config(_v2_link(0x80, _v2_body())) is None
+
+
+def _v2_raw(encoded: str) -> bytes:
+    return base64.b64decode(config_coder._from_url_safe_base64(encoded[len(V2_PREFIX):]))
+
+
+def test_no_zdict_without_registered_dictionary(monkeypatch):
+    monkeypatch.setattr(config_coder, "_V2_ZDICTS", {})
+    assert not _v2_raw(compress_config(GROUP, 2))[0] & V2_HEADER_ZDICT
+
+
+def test_zdict_round_trip(monkeypatch):
+    zdict = train(load_groups([EXAMPLE_PATH]) * 2, 1024)
+    monkeypatch.setattr(config_coder, "_V2_ZDICTS", {1: zdict})
+    encoded = compress_config(GROUP, 2)
+    raw = _v2_raw(encoded)
+    assert raw[0] & V2_HEADER_ZDICT and raw[1] == 1
+    assert decompress_config(encoded) == EXPECTED
+
+
+def test_unknown_zdict_id_returns_none():
+    unknown_id = max(config_coder._V2_ZDICTS, default=0) + 1
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    body = compressor.compress(_v2_body()) + compressor.flush()
+    link = _v2_link(V2_HEADER_DEFLATE | V2_HEADER_ZDICT, bytes([unknown_id]) + body)
+    assert decompress_config(link) is None
+
+
+def test_newline_in_ip_is_rejected():
+    assert compress_config({'servers': [_server("a\nb")]}, 2) == ""
+
+
+def test_trainer_reads_flat_example():
+    # 示例配置带有 // 注释与末尾多余的逗号，服务器是带 parent_ip 的扁平列表
+    groups = load_groups([EXAMPLE_PATH])
+    assert len(groups) == 1
+    hub, modpack = groups[0]['servers']
+    assert [child['ip'] for child in hub['children']] == ["survival.example.com:25566"]
+    assert modpack['ip'] == "modpack.independent.net:25570"
+
+
+def test_trainer_reads_exported_tree(tmp_path):
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps(GROUP, ensure_ascii=False), encoding="utf-8")
+    assert load_groups([str(path)]) == [{'footer': GROUP['footer'], 'servers': GROUP['servers']}]
+
+
+def test_trainer_skips_fragments_from_a_single_group():
+    other = {'footer': "", 'servers': [_server("lobby.example.com", tag="大厅")]}
+    zdict = train([{'footer': "", 'servers': GROUP['servers']}, other], 1024)
+    assert ".example.com".encode() in zdict and "大厅".encode() in zdict
+    assert b"modpack." not in zdict
@@ -0,0 +1,250 @@
+import asyncio
+import base64
+import time
+
+import httpx
+import pytest
+
+from xducraft_bot.plugins.xducraft_mc_status import decode_image as decode_image_module, disk_cache
+from xducraft_bot.plugins.xducraft_mc_status.constants import IMAGE_DOWNLOAD_MAX_BYTES
+from xducraft_bot.plugins.xducraft_mc_status.decode_image import (
+    decode_image, decode_base64_data, download_image_with_cache, get_data_uri_cache_stats,
+)
+from xducraft_bot.plugins.xducraft_mc_status.disk_cache import CACHE_TTL, get_cache_key, read_from_cache
+
+URL = "https://icons.example.com/server.png"
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(64))
+
+
+class _Server:
+    """记录请求并按 handler 返回响应的 httpx.MockTransport 替身服务器。"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(0.01)  # 让并发的调用方有机会在下载完成前到达
+        return self.handler(request)
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(cache_dir):
+    decode_image_module._memory_cache.clear()
+    decode_image_module._data_uri_cache.clear()
+    yield
+    decode_image_module._memory_cache.clear()
+    decode_image_module._data_uri_cache.clear()
+    assert not decode_image_module._inflight
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """将 decode_image 中创建的 httpx.AsyncClient 指向 MockTransport，返回记录请求的服务器。"""
+    real_client = httpx.AsyncClient
+
+    def _serve(handler):
+        server = _Server(handler)
+        monkeypatch.setattr(decode_image_module.httpx, "AsyncClient",
+                            lambda **kwargs: real_client(transport=httpx.MockTransport(server), **kwargs))
+        return server
+
+    return _serve
+
+
+def _png_response(request, **headers):
+    return httpx.Response(200, headers={"Content-Type": "image/png", **headers}, content=PNG)
+
+
+def _load(url=URL):
+    result = asyncio.run(download_image_with_cache(url))
+    return None if result is None else result.getvalue()
+
+
+def _disk_entry(url=URL):
+    with disk_cache._lock:
+        return disk_cache._index.get(get_cache_key(url))
+
+
+# --- 并发去重（_inflight） ---
+
+def test_concurrent_cold_loads_share_one_request(serve):
+    server = serve(_png_response)
+
+    async def _run():
+        return await asyncio.gather(*(download_image_with_cache(URL) for _ in range(20)))
+
+    results = asyncio.run(_run())
+    assert len(server.requests) == 1
+    assert all(result.getvalue() == PNG for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_load(serve):
+    server = serve(_png_response)
+
+    async def _run():
+        first = asyncio.ensure_future(download_image_with_cache(URL))
+        second = asyncio.ensure_future(download_image_with_cache(URL))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(_run()).getvalue() == PNG
+    assert len(server.requests) == 1
+
+
+def test_second_load_hits_memory_then_disk(serve):
+    server = serve(_png_response)
+    assert _load() == PNG
+    assert _load() == PNG  # 内存缓存
+    decode_image_module._memory_cache.clear()
+    assert _load() == PNG  # 磁盘缓存
+    assert len(server.requests) == 1
+
+
+# --- 条件请求（304） ---
+
+def _expire_disk_entry(url=URL):
+    """将磁盘缓存条目的缓存时间改为已过期（仍在重新验证的保留期内），并清空内存缓存。"""
+    with disk_cache._lock:
+        offset, size, record_size, _, validators = disk_cache._index[get_cache_key(url)]
+        disk_cache._index_put(get_cache_key(url), (offset, size, record_size, time.time() - CACHE_TTL - 1, validators))
+    decode_image_module._memory_cache.clear()
+
+
+def test_not_modified_refreshes_entry(serve):
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v2"'})
+        return _png_response(request, ETag='"v1"', **{"Last-Modified": "Mon, 19 Oct 2026 00:00:00 GMT"})
+
+    server = serve(handler)
+    assert _load() == PNG
+    _expire_disk_entry()
+
+    before = time.time()
+    assert _load() == PNG
+    assert len(server.requests) == 2
+    assert server.requests[1].headers["If-Modified-Since"] == "Mon, 19 Oct 2026 00:00:00 GMT"
+    entry = _disk_entry()
+    assert entry[3] >= before  # 缓存时间已刷新
+    assert entry[4] == {"etag": '"v2"'}  # 记录服务器返回的最新校验信息
+    assert read_from_cache(get_cache_key(URL))[0] == PNG
+
+
+def test_changed_image_replaces_entry(serve):
+    new_png = PNG + b"new"
+
+    def handler(request):
+        if request.headers.get("If-None-Match"):
+            return httpx.Response(200, headers={"Content-Type": "image/png", "ETag": '"v2"'}, content=new_png)
+        return _png_response(request, ETag='"v1"')
+
+    serve(handler)
+    assert _load() == PNG
+    _expire_disk_entry()
+    assert _load() == new_png
+    assert _disk_entry()[4] == {"etag": '"v2"'}
+
+
+def test_failed_revalidation_falls_back_to_stale_copy(serve):
+    state = {"down": False}
+
+    def handler(request):
+        if state["down"]:
+            raise httpx.ConnectError("unreachable", request=request)
+        return _png_response(request, ETag='"v1"')
+
+    serve(handler)
+    assert _load() == PNG
+    _expire_disk_entry()
+    state["down"] = True
+    assert _load() == PNG
+
+
+# --- 流式下载的校验 ---
+
+def test_oversized_content_length_is_rejected(serve):
+    server = serve(lambda request: httpx.Response(
+        200, headers={"Content-Type": "image/png", "Content-Length": str(IMAGE_DOWNLOAD_MAX_BYTES + 1)}, content=PNG))
+    assert _load() is None
+    assert len(server.requests) == 1
+    assert _disk_entry() is None
+
+
+def test_oversized_stream_is_aborted_at_cap(serve):
+    chunk = 64 * 1024
+    sent = []
+
+    async def body():
+        yield PNG
+        for _ in range(IMAGE_DOWNLOAD_MAX_BYTES // chunk * 4):
+            sent.append(chunk)
+            yield bytes(chunk)
+
+    serve(lambda request: httpx.Response(200, headers={"Content-Type": "image/png"}, content=body()))
+    assert _load() is None
+    # 超过上限后立即中止，不会读完整个响应体
+    assert sum(sent) <= IMAGE_DOWNLOAD_MAX_BYTES + chunk
+    assert _disk_entry() is None
+
+
+@pytest.mark.parametrize("content_type", ["text/html", "application/json; charset=utf-8"])
+def test_non_image_content_type_is_rejected(serve, content_type):
+    serve(lambda request: httpx.Response(200, headers={"Content-Type": content_type}, content=PNG))
+    assert _load() is None
+    assert _disk_entry() is None
+
+
+def test_non_image_body_is_rejected(serve):
+    serve(lambda request: httpx.Response(200, headers={"Content-Type": "image/png"},
+                                         content=b"<html><body>404</body></html>"))
+    assert _load() is None
+    assert _disk_entry() is None
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/octet-stream", PNG),
+    ("", b"GIF89a"),  # 比文件头检查的长度更短的完整响应
+    ("image/webp", b"RIFF\x00\x00\x00\x00WEBPVP8 "),
+])
+def test_image_bodies_are_accepted(serve, content_type, body):
+    serve(lambda request: httpx.Response(200, headers={"Content-Type": content_type} if content_type else {},
+                                         content=body))
+    assert _load() == body
+    assert _disk_entry() is not None
+
+
+def test_http_error_returns_none(serve):
+    serve(lambda request: httpx.Response(404, headers={"Content-Type": "text/plain"}, content=b"missing"))
+    assert _load() is None
+
+
+# --- Base64 数据URI ---
+
+DATA_URI = "data:image/png;base64," + base64.b64encode(PNG).decode("ascii")
+
+
+def test_data_uri_is_decoded_and_cached():
+    before = get_data_uri_cache_stats()["hits"]
+    assert decode_base64_data(DATA_URI).getvalue() == PNG
+    assert decode_base64_data(DATA_URI).getvalue() == PNG
+    assert get_data_uri_cache_stats()["hits"] == before + 1
+
+
+def test_decode_image_does_not_fetch_data_uris(serve):
+    server = serve(_png_response)
+    assert asyncio.run(decode_image(DATA_URI)).getvalue() == PNG
+    assert not server.requests
+
+
+@pytest.mark.parametrize("data_uri", [
+    "data:image/png;base64,",  # 空数据
+    "data:image/png,rawdata",  # 不是 Base64
+    "data:text/plain;base64,aGVsbG8=",  # 不是图片
+    "data:image/png;base64,not*base64",
+    "data:image/png;base64," + "A" * ((IMAGE_DOWNLOAD_MAX_BYTES // 3 + 1) * 4),  # 超过大小上限
+])
+def test_invalid_data_uris_return_none(data_uri):
+    assert decode_base64_data(data_uri) is None
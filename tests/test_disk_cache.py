@@ -0,0 +1,138 @@
+import os
+
+import pytest
+
+from xducraft_bot.plugins.xducraft_mc_status import disk_cache
+from xducraft_bot.plugins.xducraft_mc_status.disk_cache import (
+    get_cache_key, read_from_cache, write_to_cache, sweep_cache, close_cache, PACK_NAME, INDEX_NAME,
+)
+
+pytestmark = pytest.mark.usefixtures("cache_dir")
+
+ICONS = {f"https://example.com/icon{i}.png": bytes([i]) * (100 + i) for i in range(4)}
+
+
+def _crash():
+    """模拟进程崩溃：不保存索引快照，直接丢弃打开的文件与内存中的索引。"""
+    with disk_cache._lock:
+        disk_cache._close_store()
+        disk_cache._index_clear()
+
+
+def _write(*urls, validators=None):
+    for url in urls:
+        assert write_to_cache(get_cache_key(url), ICONS[url], validators)
+
+
+def _cached(url):
+    result = read_from_cache(get_cache_key(url))
+    return None if result is None else result[0]
+
+
+def _pack_size():
+    with disk_cache._lock:
+        return disk_cache._pack_size
+
+
+URLS = list(ICONS)
+
+
+def test_snapshot_round_trip(cache_dir):
+    _write(*URLS[:3], validators={"etag": '"v1"'})
+    close_cache()
+    assert (cache_dir / INDEX_NAME).exists()
+    for url in URLS[:3]:
+        assert _cached(url) == ICONS[url]
+    assert _cached(URLS[3]) is None
+
+
+def test_records_after_snapshot_are_recovered(cache_dir):
+    _write(*URLS[:2])
+    sweep_cache()
+    _write(URLS[2])
+    _crash()
+    for url in URLS[:3]:
+        assert _cached(url) == ICONS[url]
+
+
+def test_torn_tail_is_truncated(cache_dir):
+    _write(*URLS[:2])
+    sweep_cache()
+    valid_size = _pack_size()
+    _crash()
+
+    # 写入中途崩溃：数据文件末尾只留下半条记录
+    record = disk_cache._encode_record(get_cache_key(URLS[2]), ICONS[URLS[2]], None, 0.0)
+    with open(cache_dir / PACK_NAME, "ab") as f:
+        f.write(record[:len(record) // 2])
+
+    assert _cached(URLS[0]) == ICONS[URLS[0]]
+    assert _cached(URLS[1]) == ICONS[URLS[1]]
+    assert _cached(URLS[2]) is None
+    assert os.path.getsize(cache_dir / PACK_NAME) == valid_size
+
+    # 截断后从有效末尾继续追加
+    _write(URLS[3])
+    _crash()
+    assert _cached(URLS[3]) == ICONS[URLS[3]]
+    assert _cached(URLS[1]) == ICONS[URLS[1]]
+
+
+def test_corrupt_record_stops_scan(cache_dir):
+    _write(*URLS[:2])
+    valid_size = _pack_size()
+    _write(URLS[2], URLS[3])
+    _crash()
+
+    # 没有索引快照，第三条记录的数据损坏：扫描在此停止，之后的记录一并丢弃
+    with open(cache_dir / PACK_NAME, "r+b") as f:
+        f.seek(valid_size + disk_cache._RECORD_HEADER.size)
+        f.write(b"\xff")
+
+    assert _cached(URLS[0]) == ICONS[URLS[0]]
+    assert _cached(URLS[1]) == ICONS[URLS[1]]
+    assert _cached(URLS[2]) is None
+    assert _cached(URLS[3]) is None
+    assert os.path.getsize(cache_dir / PACK_NAME) == valid_size
+
+
+def test_corrupt_snapshot_falls_back_to_full_scan(cache_dir):
+    _write(*URLS[:3])
+    close_cache()
+    index_path = cache_dir / INDEX_NAME
+    payload = bytearray(index_path.read_bytes())
+    payload[len(payload) // 2] ^= 0xff
+    index_path.write_bytes(bytes(payload))
+
+    for url in URLS[:3]:
+        assert _cached(url) == ICONS[url]
+
+
+def test_snapshot_beyond_pack_is_ignored(cache_dir):
+    _write(URLS[0])
+    valid_size = _pack_size()
+    _write(URLS[1])
+    close_cache()
+    # 数据文件比快照覆盖的范围短（快照之后数据文件被截断）：快照失效，改为扫描整个数据文件
+    with open(cache_dir / PACK_NAME, "r+b") as f:
+        f.truncate(valid_size + 10)
+
+    assert _cached(URLS[0]) == ICONS[URLS[0]]
+    assert _cached(URLS[1]) is None
+    assert os.path.getsize(cache_dir / PACK_NAME) == valid_size
+
+
+def test_pack_is_synced_before_snapshot(monkeypatch):
+    _write(URLS[0])
+    with disk_cache._lock:
+        pack_fd = disk_cache._pack.fileno()
+    synced = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        synced.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(disk_cache.os, "fsync", fsync)
+    sweep_cache()
+    assert synced and synced[0] == pack_fd
@@ -0,0 +1,122 @@
+import pytest
+from PIL import ImageFont
+
+from xducraft_bot.plugins.xducraft_mc_status.constants import MINECRAFT_COLOR_CODES, HTML_COLOR_CODES
+from xducraft_bot.plugins.xducraft_mc_status.drawing_utils import parse_motd_runs, get_runs_width, draw_text_runs
+from xducraft_bot.plugins.xducraft_mc_status.text_metrics import text_length
+
+FONT = ImageFont.load_default()
+DEFAULT = (1, 2, 3, 255)
+
+
+def _runs(text, is_html=False):
+    """解析结果中的 (文本, 颜色)，省略宽度。"""
+    return [(chunk, color) for chunk, color, _ in parse_motd_runs(text, FONT, is_html, DEFAULT)]
+
+
+class _RecordingDraw:
+    """只记录 draw.text 调用的替身。"""
+
+    def __init__(self):
+        self.calls = []
+
+    def text(self, xy, text, fill, font, anchor):
+        self.calls.append((xy, text, fill))
+
+
+# --- § 码 ---
+
+def test_color_codes():
+    assert _runs("§aHello §bWorld") == [("Hello ", MINECRAFT_COLOR_CODES['a']), ("World", MINECRAFT_COLOR_CODES['b'])]
+
+
+def test_text_before_first_code_uses_default_color():
+    assert _runs("Hi §cthere") == [("Hi ", DEFAULT), ("there", MINECRAFT_COLOR_CODES['c'])]
+
+
+def test_uppercase_color_code():
+    assert _runs("§AGreen") == [("Green", MINECRAFT_COLOR_CODES['a'])]
+
+
+def test_format_codes_are_stripped_without_changing_color():
+    assert _runs("§e§lBold§oItalic §kx") == [("BoldItalic x", MINECRAFT_COLOR_CODES['e'])]
+
+
+def test_reset_code():
+    # §r 重置为白色（MINECRAFT_COLOR_CODES['r']），而不是调用方传入的默认颜色
+    assert _runs("§cRed§rPlain") == [("Red", MINECRAFT_COLOR_CODES['c']), ("Plain", MINECRAFT_COLOR_CODES['r'])]
+
+
+def test_adjacent_runs_with_same_color_are_merged():
+    assert _runs("§aA§lB§aC") == [("ABC", MINECRAFT_COLOR_CODES['a'])]
+
+
+def test_unknown_code_is_skipped():
+    assert _runs("§zX") == [("X", DEFAULT)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("abc§", [("abc", DEFAULT)]),
+    ("§", []),
+    ("§a§", []),
+])
+def test_trailing_lone_section_sign(text, expected):
+    assert _runs(text) == expected
+
+
+def test_tags_are_literal_outside_html_mode():
+    assert _runs('<font color="red">x</font>') == [('<font color="red">x</font>', DEFAULT)]
+
+
+# --- HTML MOTD ---
+
+def test_html_font_colors():
+    text = '<font color="gold">XDU</font><font color="aqua">Craft</font>'
+    assert _runs(text, is_html=True) == [("XDU", HTML_COLOR_CODES['gold']), ("Craft", HTML_COLOR_CODES['aqua'])]
+
+
+def test_html_hex_and_unknown_colors():
+    text = '<font color="#112233">a</font><font color="not-a-color">b</font><font color="">c</font>'
+    assert _runs(text, is_html=True) == [("a", (17, 34, 51)), ("bc", DEFAULT)]
+
+
+def test_html_strips_other_tags_and_keeps_stray_brackets():
+    assert _runs("a<br>b < c", is_html=True) == [("ab < c", DEFAULT)]
+
+
+def test_section_codes_inside_html():
+    # <font> 内的 § 码仍然生效；之后的 <font> 标签覆盖 § 码设置的颜色
+    text = '<font color="gold">§lXDU §bCraft</font><font color="gray">!</font>'
+    assert _runs(text, is_html=True) == [
+        ("XDU ", HTML_COLOR_CODES['gold']), ("Craft", MINECRAFT_COLOR_CODES['b']), ("!", HTML_COLOR_CODES['gray'])]
+
+
+def test_html_runs_advance_by_clean_text_width():
+    # 旧实现按包含 § 码的原始文本宽度前进，格式码后面会留下空隙；现在只按实际绘制的文本计算
+    runs = parse_motd_runs('<font color="gold">§lAB</font><font color="aqua">CD</font>', FONT, True, DEFAULT)
+    draw = _RecordingDraw()
+    draw_text_runs(draw, runs, (10, 20), FONT)
+    assert draw.calls == [
+        ((10, 20), "AB", HTML_COLOR_CODES['gold']),
+        ((10 + text_length(FONT, "AB"), 20), "CD", HTML_COLOR_CODES['aqua']),
+    ]
+
+
+# --- 宽度 ---
+
+def test_run_widths_sum_to_total():
+    runs = parse_motd_runs("§aXDU §bCraft §7| §fSurvival", FONT, False, DEFAULT)
+    assert [width for _, _, width in runs] == [text_length(FONT, chunk) for chunk, _, _ in runs]
+    assert get_runs_width(runs) == pytest.approx(sum(text_length(FONT, chunk) for chunk, _, _ in runs))
+    assert get_runs_width(()) == 0
+
+
+def test_width_ignores_codes():
+    plain = get_runs_width(parse_motd_runs("XDU Craft", FONT, False, DEFAULT))
+    assert get_runs_width(parse_motd_runs("§a§lXDU §bCraft", FONT, False, DEFAULT)) == pytest.approx(plain)
+    html = '<font color="gold">XDU </font><font color="aqua">§lCraft</font>'
+    assert get_runs_width(parse_motd_runs(html, FONT, True, DEFAULT)) == pytest.approx(plain)
+
+
+def test_results_are_cached():
+    assert parse_motd_runs("§aCached", FONT, False, DEFAULT) is parse_motd_runs("§aCached", FONT, False, DEFAULT)
@@ -0,0 +1,160 @@
+import copy
+import random
+
+import pytest
+
+from xducraft_bot.plugins.xducraft_mc_status.constants import (
+    DEFAULT_SERVER_PRIORITY, SERVER_ROW_HEIGHT, PLAYER_LIST_OFFSET, CHILD_INDENT_PX, LAYOUT_BASE_PADDING,
+    LAYOUT_SERVER_ICON_SIZE,
+)
+from xducraft_bot.plugins.xducraft_mc_status.layout import build_layout, ANONYMOUS_PLAYER_ID
+
+
+# --- 重写之前的递归实现（status_fetcher.preprocess_server_data / prepare_data_for_display 与 _collect_rows） ---
+# 唯一有意的差异：同一层级按优先级稳定排序（旧实现中排序被注释掉了）
+
+def _old_preprocess(server_data_list):
+    for res in server_data_list:
+        if res.get('online') and res.get('players', {}).get('sample'):
+            res['players']['sample'] = [p for p in res['players']['sample'] if p.get('id') != ANONYMOUS_PLAYER_ID]
+        if res.get('children'):
+            res['children'] = _old_preprocess(res['children'])
+    return server_data_list
+
+
+def _old_prepare_for_display(server_tree, show_all_servers):
+    display_tree = []
+    for node in server_tree:
+        if node.get('ignore_in_list', False):
+            continue
+        if node.get('children'):
+            node['children'] = _old_prepare_for_display(node['children'], show_all_servers)
+        if show_all_servers or node.get('online', False) or node.get('children'):
+            display_tree.append(node)
+    display_tree.sort(key=lambda node: node.get('priority', DEFAULT_SERVER_PRIORITY))
+    return display_tree
+
+
+def _old_collect_rows(nodes, y_cursor, rows, level=0):
+    for server_data in nodes:
+        players = server_data.get('players', {})
+        has_players = bool(server_data.get('online') and players.get('online') != 0 and players.get('sample'))
+        height = SERVER_ROW_HEIGHT + (PLAYER_LIST_OFFSET if has_players else 0)
+        rows.append({"server": {k: v for k, v in server_data.items() if k != 'children'}, "y": y_cursor,
+                     "height": height, "level": level, "has_players": has_players})
+        y_cursor += height
+        if server_data.get('children'):
+            y_cursor = _old_collect_rows(server_data['children'], y_cursor, rows, level + 1)
+    return y_cursor
+
+
+def _old_layout(server_tree, show_all_servers):
+    rows = []
+    _old_collect_rows(_old_prepare_for_display(_old_preprocess(copy.deepcopy(server_tree)), show_all_servers), 0, rows)
+    return rows
+
+
+# --- 随机服务器树 ---
+
+def _random_server(rng, index):
+    online = rng.random() < 0.6
+    sample = [{"name": f"p{index}_{j}", "id": rng.choice([ANONYMOUS_PLAYER_ID, f"uuid-{index}-{j}"])}
+              for j in range(rng.randrange(4))]
+    server = {
+        "ip": f"s{index}.example.com",
+        "online": online,
+        "ignore_in_list": rng.random() < 0.1,
+        "players": {"online": len(sample), "max": 20, "sample": sample},
+        "children": [],
+    }
+    if rng.random() < 0.5:
+        server["priority"] = rng.choice([1, 2, 3, DEFAULT_SERVER_PRIORITY])
+    return server
+
+
+def _random_tree(seed, count=60, depth=5):
+    rng = random.Random(seed)
+    tree = []
+    parents = [tree]
+    for index in range(count):
+        server = _random_server(rng, index)
+        level = rng.randrange(min(depth, len(parents)))
+        parents[level].append(server)
+        del parents[level + 1:]
+        parents.append(server["children"])
+    return tree
+
+
+def _trunk_x(level):
+    return LAYOUT_BASE_PADDING + (level - 1) * CHILD_INDENT_PX + LAYOUT_SERVER_ICON_SIZE / 2
+
+
+@pytest.mark.parametrize("show_all_servers", [False, True])
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_recursive_layout(seed, show_all_servers):
+    tree = _random_tree(seed)
+    original = copy.deepcopy(tree)
+    rows = build_layout(tree, show_all_servers)
+    expected = _old_layout(tree, show_all_servers)
+    assert [{k: row[k] for k in ("server", "y", "height", "level", "has_players")} for row in rows] == expected
+    assert tree == original  # 不修改输入
+
+
+def test_hidden_parent_kept_for_visible_child():
+    tree = [{"ip": "parent", "online": False, "children": [
+        {"ip": "offline-child", "online": False},
+        {"ip": "online-child", "online": True},
+    ]}]
+    rows = build_layout(tree, show_all_servers=False)
+    assert [(row["server"]["ip"], row["level"]) for row in rows] == [("parent", 0), ("online-child", 1)]
+
+
+def test_ignored_branch_is_skipped():
+    tree = [{"ip": "a", "online": True, "ignore_in_list": True, "children": [{"ip": "a1", "online": True}]},
+            {"ip": "b", "online": True}]
+    assert [row["server"]["ip"] for row in build_layout(tree, show_all_servers=True)] == ["b"]
+
+
+def test_connector_segments():
+    tree = [{"ip": "root", "online": True, "children": [
+        {"ip": "c1", "online": True, "children": [{"ip": "g1", "online": True}]},
+        {"ip": "c2", "online": True},
+    ]}]
+    root, c1, g1, c2 = build_layout(tree, show_all_servers=False)
+    h, line_y = SERVER_ROW_HEIGHT, LAYOUT_SERVER_ICON_SIZE / 2
+
+    # 父服从图标底部向下引出主干
+    assert root["connectors"] == [(_trunk_x(1), LAYOUT_SERVER_ICON_SIZE, _trunk_x(1), h)]
+    # 不是最后一个子服：主干贯穿整行，并继续引出下一层的主干
+    assert c1["connectors"] == [
+        (_trunk_x(1), 0, _trunk_x(1), h),
+        (_trunk_x(1), line_y, LAYOUT_BASE_PADDING + CHILD_INDENT_PX, line_y),
+        (_trunk_x(2), LAYOUT_SERVER_ICON_SIZE, _trunk_x(2), h),
+    ]
+    # 上一层的主干穿过孙服所在的行，直到最后一个子服
+    assert g1["connectors"] == [
+        (_trunk_x(1), 0, _trunk_x(1), h),
+        (_trunk_x(2), 0, _trunk_x(2), line_y),
+        (_trunk_x(2), line_y, LAYOUT_BASE_PADDING + 2 * CHILD_INDENT_PX, line_y),
+    ]
+    # 最后一个子服：主干在自身图标的中线处结束
+    assert c2["connectors"] == [
+        (_trunk_x(1), 0, _trunk_x(1), line_y),
+        (_trunk_x(1), line_y, LAYOUT_BASE_PADDING + CHILD_INDENT_PX, line_y),
+    ]
+
+
+def test_deep_chain_does_not_hit_recursion_limit():
+    # 旧的递归实现在超过解释器递归深度（默认 1000）的链上会抛出 RecursionError
+    depth = 5000
+    leaf = {"ip": f"s{depth - 1}", "online": True, "children": []}
+    node = leaf
+    for index in range(depth - 2, -1, -1):
+        node = {"ip": f"s{index}", "online": False, "children": [node]}
+    tree = [node]
+
+    rows = build_layout(tree, show_all_servers=False)
+    assert len(rows) == depth
+    assert [row["level"] for row in rows] == list(range(depth))
+    assert rows[-1]["y"] == (depth - 1) * SERVER_ROW_HEIGHT
+    assert len(rows[-1]["connectors"]) == 2  # 只有自身的 L 形连接线，祖先的主干都已结束
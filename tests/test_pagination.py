@@ -0,0 +1,135 @@
+import pytest
+
+from xducraft_bot.plugins.xducraft_mc_status import image_renderer
+from xducraft_bot.plugins.xducraft_mc_status.constants import MAX_PAGE_HEIGHT, SERVER_ROW_HEIGHT, PLAYER_LIST_OFFSET
+from xducraft_bot.plugins.xducraft_mc_status.image_renderer import paginate_rows, build_page_jobs
+from xducraft_bot.plugins.xducraft_mc_status.layout import build_layout
+
+FOOTER = "页脚"
+LIMIT = MAX_PAGE_HEIGHT - image_renderer._page_chrome_height(FOOTER)
+
+
+def _server(ip, children=(), players=0, favicon=""):
+    sample = [{"name": f"{ip}-{j}", "id": f"{ip}-{j}"} for j in range(players)]
+    return {"ip": ip, "online": True, "favicon": favicon,
+            "players": {"online": players, "max": 20, "sample": sample}, "children": list(children)}
+
+
+def _group(name, size, players=0):
+    """一个根服务器带 size - 1 个子服的服务器组。"""
+    return _server(name, [_server(f"{name}.{i}", players=players) for i in range(size - 1)])
+
+
+def _groups(sizes):
+    return build_layout([_group(f"g{index}", size) for index, size in enumerate(sizes)], show_all_servers=True)
+
+
+def _root_of(rows):
+    """每行所属的服务器组（根服务器的 IP）。"""
+    root, roots = None, []
+    for row in rows:
+        if row["level"] == 0:
+            root = row["server"]["ip"]
+        roots.append(root)
+    return roots
+
+
+def _columns(pages):
+    return [column for page in pages for column in page]
+
+
+def _flatten(pages):
+    return [row["server"]["ip"] for column in _columns(pages) for row in column]
+
+
+def _check_columns(rows, pages):
+    """所有行按原顺序出现且只出现一次；每列高度不超过上限，行的y坐标从列顶开始连续排列。"""
+    assert _flatten(pages) == [row["server"]["ip"] for row in rows]
+    for column in _columns(pages):
+        assert image_renderer._rows_height(column) <= LIMIT
+        y = 0
+        for row in column:
+            assert row["y"] == y
+            y += row["height"]
+
+
+def test_groups_are_never_split_across_pages():
+    rows = _groups([7, 12, 3, 9, 15, 5, 11, 8])
+    pages = paginate_rows(rows, FOOTER)
+    assert len(pages) > 1
+    _check_columns(rows, pages)
+    for column in _columns(pages):
+        assert column[0]["level"] == 0  # 每列都从一个组的根服务器开始
+    column_of_group = {}
+    for index, column in enumerate(_columns(pages)):
+        for root in _root_of(column):
+            assert column_of_group.setdefault(root, index) == index
+
+
+def test_group_taller_than_page_is_split_at_row_boundaries():
+    size = LIMIT // SERVER_ROW_HEIGHT * 2 + 5
+    rows = build_layout([_group("big", size), _group("small", 3)], show_all_servers=True)
+    assert image_renderer._rows_height(rows[:size]) > MAX_PAGE_HEIGHT
+    pages = paginate_rows(rows, FOOTER)
+    _check_columns(rows, pages)
+    assert len(pages) == 3
+    # 超高的组被拆开，其余的组仍保持完整
+    assert [row["server"]["ip"].split(".")[0] for row in _columns(pages)[-1]] == ["big"] * 5 + ["small"] * 3
+
+
+def test_row_with_player_list_taller_than_limit_still_gets_a_page(monkeypatch):
+    monkeypatch.setattr(image_renderer, "MAX_PAGE_HEIGHT", 10)
+    rows = build_layout([_server("a", players=3), _server("b")], show_all_servers=True)
+    pages = paginate_rows(rows, FOOTER)
+    assert [[row["server"]["ip"] for row in page[0]] for page in pages] == [["a"], ["b"]]
+
+
+def test_two_columns_are_balanced(monkeypatch):
+    monkeypatch.setattr(image_renderer, "LAYOUT_COLUMNS", 2)
+    rows = _groups([4, 6, 3, 5, 4, 2])
+    pages = paginate_rows(rows, FOOTER)
+    assert len(pages) == 1 and len(pages[0]) == 2
+    _check_columns(rows, pages)
+    left, right = (image_renderer._rows_height(column) for column in pages[0])
+    assert abs(left - right) <= 6 * SERVER_ROW_HEIGHT  # 相差不超过最大的一个组
+    assert pages[0][1][0]["level"] == 0  # 第二列从一个组的根服务器开始
+
+
+def test_two_columns_do_not_add_pages(monkeypatch):
+    rows = _groups([20, 15, 18, 12, 25, 9, 14, 30])
+    single = paginate_rows(rows, FOOTER)
+    monkeypatch.setattr(image_renderer, "LAYOUT_COLUMNS", 2)
+    pages = paginate_rows(rows, FOOTER)
+    _check_columns(rows, pages)
+    assert all(1 <= len(page) <= 2 for page in pages)
+    assert len(pages) == -(-len(_columns(single)) // 2)
+
+
+def test_two_column_jobs_carry_only_their_icons(monkeypatch):
+    monkeypatch.setattr(image_renderer, "LAYOUT_COLUMNS", 2)
+    tree = [_server(f"s{i}", favicon=f"icon{i}") for i in range(LIMIT // SERVER_ROW_HEIGHT * 3)]
+    rows = build_layout(tree, show_all_servers=True)
+    icons = {f"icon{i}": b"png" for i in range(len(tree))}
+    jobs = build_page_jobs(rows, FOOTER, icons)
+    assert [job["title"] for job in jobs] == ["Minecraft服务器状态 (1/2)", "Minecraft服务器状态 (2/2)"]
+    for job in jobs:
+        expected = {row["server"]["favicon"] for column in job["columns"] for row in column}
+        assert set(job["icons"]) == expected
+
+
+@pytest.mark.parametrize("columns", [1, 2])
+def test_empty_server_list(monkeypatch, columns):
+    monkeypatch.setattr(image_renderer, "LAYOUT_COLUMNS", columns)
+    assert paginate_rows([], FOOTER) == [[[]]]
+    jobs = build_page_jobs([], FOOTER, {})
+    assert len(jobs) == 1
+    assert jobs[0]["title"] == "Minecraft服务器状态"
+    assert jobs[0]["columns"] == [[]]
+    assert jobs[0]["icons"] == {}
+
+
+def test_player_list_rows_use_their_full_height():
+    rows = build_layout([_group("g", 40, players=2)], show_all_servers=True)
+    pages = paginate_rows(rows, FOOTER)
+    _check_columns(rows, pages)
+    assert _columns(pages)[0][1]["height"] == SERVER_ROW_HEIGHT + PLAYER_LIST_OFFSET
@@ -1,4 +1,6 @@
-from nonebot import on_command
+import asyncio
+
+from nonebot import on_command, get_driver
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, PrivateMessageEvent, Message, MessageEvent
 from nonebot.params import CommandArg
 from nonebot.plugin import PluginMetadata
@@ -7,6 +9,9 @@ from nonebot.plugin import PluginMetadata
 from .handlers import SUBCOMMAND_HANDLERS, handle_query_all, handle_query_single, handle_private_import
 # 从 data_manager 导入需要在主命令中直接使用的函数
 from .data_manager import get_show_offline_by_default
+from .render_pool import warm_up_render_pool, shutdown_render_pool
+from .disk_cache import prepare_cache_dir, run_cache_sweeper, close_cache
+from .constants import IMAGE_CACHE_SWEEP_INTERVAL
 
 # --- 唯一的命令匹配器 ---
 mc_status = on_command("mcs", aliases={"mcstatus", "服务器", "状态"}, block=True, priority=4)
@@ -27,6 +32,44 @@ __plugin_meta__ = PluginMetadata(
 ...更多命令请使用 /mcs help 查看""",
 )
 
+driver = get_driver()
+
+
+# 启动时的后台任务（保留引用，防止任务在完成前被回收；关闭时统一取消）
+_background_tasks = set()
+
+
+def _spawn_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@driver.on_startup
+async def _start_render_pool_and_housekeeping():
+    """
+    启动时预热渲染执行池，避免首次查询承担字体加载等开销；
+    随后在后台线程中创建图片缓存目录、建立缓存索引并清理过期缓存（不阻塞机器人启动），并定期清理缓存。
+    进程池模式下工作进程在预热时即 fork 完成，必须先于缓存维护线程启动，
+    否则子进程可能继承被这些线程持有的锁（如 disk_cache._lock 或标准输出的锁）而死锁。
+    """
+    warm_up_render_pool()
+    _spawn_background(asyncio.to_thread(prepare_cache_dir))
+    _spawn_background(run_cache_sweeper(IMAGE_CACHE_SWEEP_INTERVAL))
+
+
+@driver.on_shutdown
+async def _stop_render_pool():
+    shutdown_render_pool()
+
+
+@driver.on_shutdown
+async def _stop_background_tasks():
+    for task in list(_background_tasks):
+        task.cancel()
+    # 保存图片缓存的索引快照，下次启动时不必扫描整个数据文件
+    await asyncio.to_thread(close_cache)
+
 
 # --- 命令统一入口 ---
 @mc_status.handle()
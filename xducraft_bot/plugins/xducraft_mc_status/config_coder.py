@@ -1,7 +1,9 @@
 import json
 import zlib
 import base64
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+from .constants import CONFIG_CODEC_VERSION, CONFIG_CODEC_ZDICT
 
 # --- 紧凑数组索引常量 (与 App.vue 保持一致) ---
 S_IP = 0
@@ -14,6 +16,217 @@ S_DISPLAY_NAME = 6 # 新增
 S_CHILDREN = 7     # 原来的 S_CHILDREN 索引后移
 
 
+# --- v2 二进制格式 ---
+# 编码结果为 "2~" + URL安全Base64(头部标志字节 + 正文)；v1 编码结果是 zlib 数据的Base64，以 "eN" 等开头，不会包含 "~"
+# 正文按列存放，同类数据相邻时 deflate 压缩效果更好：
+#   字符串表（数量 + 各字符串的长度与UTF-8字节）、页脚引用、节点总数、
+#   节点标志列（每个节点一个字节，前序遍历顺序）、子节点数量列（长度 + 数据）、字段引用列（长度 + 数据）、
+#   IP 列（其余部分，以换行分隔的UTF-8文本）
+# 所有整数均为 varint（每字节 7 位，最高位表示后面还有字节）；备注、标签、颜色等重复较多的字段保存为字符串表中的下标
+# 使用预设字典压缩时，头部标志字节之后紧跟一个字节的字典编号
+V2_PREFIX = "2~"
+
+# 头部标志
+V2_HEADER_DEFLATE = 0x01          # 正文经过 raw deflate 压缩（正文较短时压缩反而更长，此时不压缩）
+V2_HEADER_SHOW_OFFLINE = 0x02     # show_offline_by_default（机器人端未使用，与 v1 一样固定为 0）
+V2_HEADER_ZDICT = 0x04            # 正文使用预设字典压缩（字典编号见头部之后的字节）
+_V2_KNOWN_HEADER_FLAGS = V2_HEADER_DEFLATE | V2_HEADER_SHOW_OFFLINE | V2_HEADER_ZDICT
+
+# 已登记的 zlib 预设字典：字典编号 -> 字典内容。短配置单独压缩时几乎没有可以引用的重复内容，预设字典可以补上这些片段
+# 字典须由 benchmarks/train_config_zdict.py 使用真实（或匿名化的）导出配置训练，
+# 并由 benchmarks/bench_config_codec.py --samples 在未参与训练的配置上验证确有收益后，才能在此登记（编号从 1 开始）
+# 目前还没有登记任何字典，编码时不会使用预设字典；解码带有未登记编号的链接会失败
+# 已生成的链接依赖字典内容，字典一经登记只能新增（使用新编号），不能修改或删除
+_V2_ZDICTS: Dict[int, bytes] = {}
+
+# 节点标志
+V2_NODE_IGNORE = 0x01
+V2_NODE_HIDE_IP = 0x02
+V2_NODE_COMMENT = 0x04
+V2_NODE_TAG = 0x08
+V2_NODE_TAG_COLOR = 0x10
+V2_NODE_DISPLAY_NAME = 0x20
+V2_NODE_CHILDREN = 0x40
+
+# 保存在字符串表中的可选字段及其对应的节点标志（按编码顺序）
+_V2_OPTIONAL_FIELDS = (
+    ('comment', V2_NODE_COMMENT),
+    ('tag', V2_NODE_TAG),
+    ('tag_color', V2_NODE_TAG_COLOR),
+    ('display_name', V2_NODE_DISPLAY_NAME),
+)
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """读取一个 varint，返回 (值, 下一个位置)。"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class _V2Writer:
+    """前序遍历服务器树，将各节点的数据分别追加到对应的列中。"""
+
+    def __init__(self):
+        self.strings: Dict[str, int] = {}  # 字符串 -> 下标（字典保持插入顺序，即下标顺序）
+        self.flags = bytearray()
+        self.counts = bytearray()
+        self.refs = bytearray()
+        self.ips: List[str] = []
+
+    def ref(self, value: str) -> int:
+        return self.strings.setdefault(value, len(self.strings))
+
+    def write_servers(self, servers: List[Dict[str, Any]]):
+        _write_varint(self.counts, len(servers))
+        for s in servers:
+            ip = s.get('ip') or ""
+            if "\n" in ip:
+                raise ValueError(f"服务器地址中不能包含换行: {ip!r}")
+            flags = 0
+            if s.get('ignore_in_list'):
+                flags |= V2_NODE_IGNORE
+            if s.get('hide_ip'):
+                flags |= V2_NODE_HIDE_IP
+            for field, flag in _V2_OPTIONAL_FIELDS:
+                if s.get(field):
+                    flags |= flag
+                    _write_varint(self.refs, self.ref(s[field]))
+            children = s.get('children') or []
+            if children:
+                flags |= V2_NODE_CHILDREN
+            self.flags.append(flags)
+            self.ips.append(ip)
+            if children:
+                self.write_servers(children)
+
+
+class _V2Reader:
+    """按列读取 v2 正文，重建服务器树（结构与 _compact_array_to_json 的输出一致）。"""
+
+    def __init__(self, flags: bytes, counts: bytes, refs: bytes, ips: List[str], strings: List[str]):
+        self.flags, self.counts, self.refs, self.ips, self.strings = flags, counts, refs, ips, strings
+        self.node = self.count_pos = self.ref_pos = 0
+
+    def read_servers(self) -> List[Dict[str, Any]]:
+        count, self.count_pos = _read_varint(self.counts, self.count_pos)
+        servers = []
+        for _ in range(count):
+            flags, ip = self.flags[self.node], self.ips[self.node]
+            self.node += 1
+            fields = {}
+            for field, flag in _V2_OPTIONAL_FIELDS:
+                if flags & flag:
+                    ref, self.ref_pos = _read_varint(self.refs, self.ref_pos)
+                    fields[field] = self.strings[ref]
+            servers.append({
+                'ip': ip,
+                'comment': fields.get('comment', ""),
+                'tag': fields.get('tag', ""),
+                'tag_color': fields.get('tag_color', ""),
+                'ignore_in_list': bool(flags & V2_NODE_IGNORE),
+                'hide_ip': bool(flags & V2_NODE_HIDE_IP),
+                'display_name': fields.get('display_name', ""),
+                'children': self.read_servers() if flags & V2_NODE_CHILDREN else []
+            })
+        return servers
+
+
+def _compress_v2(group_data: Dict[str, Any]) -> str:
+    writer = _V2Writer()
+    footer_ref = writer.ref(group_data.get('footer') or "")
+    writer.write_servers(group_data.get('servers', []))
+
+    body = bytearray()
+    _write_varint(body, len(writer.strings))
+    for value in writer.strings:
+        encoded = value.encode('utf-8')
+        _write_varint(body, len(encoded))
+        body += encoded
+    _write_varint(body, footer_ref)
+    _write_varint(body, len(writer.flags))
+    body += writer.flags
+    for column in (writer.counts, writer.refs):
+        _write_varint(body, len(column))
+        body += column
+    body += "\n".join(writer.ips).encode('utf-8')
+
+    # 分别尝试不压缩、直接压缩与使用预设字典压缩，取最短的结果
+    candidates = [bytes([0]) + body]
+    modes = [(V2_HEADER_DEFLATE, None)]
+    if CONFIG_CODEC_ZDICT and _V2_ZDICTS:
+        modes.append((V2_HEADER_DEFLATE | V2_HEADER_ZDICT, max(_V2_ZDICTS)))  # 使用最新登记的字典
+    for header, zdict_id in modes:
+        if zdict_id is None:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+            prefix = bytes([header])
+        else:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=_V2_ZDICTS[zdict_id])
+            prefix = bytes([header, zdict_id])
+        candidates.append(prefix + compressor.compress(body) + compressor.flush())
+    payload = base64.b64encode(min(candidates, key=len))
+    return V2_PREFIX + _to_url_safe_base64(payload)
+
+
+def _decompress_v2(encoded_string: str) -> Dict[str, Any]:
+    raw = base64.b64decode(_from_url_safe_base64(encoded_string[len(V2_PREFIX):]))
+    header, body = raw[0], raw[1:]
+    if header & ~_V2_KNOWN_HEADER_FLAGS:
+        raise ValueError(f"未知的 v2 头部标志: {header:#04x}")
+    if header & V2_HEADER_ZDICT:
+        zdict = _V2_ZDICTS.get(body[0])
+        if zdict is None:
+            raise ValueError(f"未知的预设字典编号: {body[0]}")
+        decompressor = zlib.decompressobj(-15, zdict=zdict)
+        body = decompressor.decompress(body[1:]) + decompressor.flush()
+        if not decompressor.eof:
+            raise ValueError("v2 配置数据不完整")
+    elif header & V2_HEADER_DEFLATE:
+        body = zlib.decompress(body, -15)
+
+    count, pos = _read_varint(body, 0)
+    strings = []
+    for _ in range(count):
+        length, pos = _read_varint(body, pos)
+        strings.append(body[pos:pos + length].decode('utf-8'))
+        pos += length
+    footer_ref, pos = _read_varint(body, pos)
+
+    node_count, pos = _read_varint(body, pos)
+    flags = body[pos:pos + node_count]
+    pos += node_count
+    columns = []
+    for _ in range(2):
+        length, pos = _read_varint(body, pos)
+        columns.append(body[pos:pos + length])
+        pos += length
+    ips = body[pos:].decode('utf-8').split("\n") if node_count else []
+    if len(flags) != node_count or len(ips) != node_count:
+        raise ValueError("v2 配置数据不完整")
+
+    reader = _V2Reader(flags, columns[0], columns[1], ips, strings)
+    server_tree = reader.read_servers()
+    if reader.node != node_count:
+        raise ValueError("v2 配置数据的节点数量不一致")
+    return {
+        'footer': strings[footer_ref],
+        'show_offline_by_default': bool(header & V2_HEADER_SHOW_OFFLINE),
+        'servers': server_tree
+    }
+
+
 def _build_tree(servers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """将扁平的服务器列表转换为嵌套的树形结构。"""
     server_map = {s['ip']: {**s, 'children': []} for s in servers}
@@ -101,11 +314,15 @@ def _from_url_safe_base64(url_safe_b64_str: str) -> bytes:
     return b64_str.encode('ascii')
 
 
-def compress_config(group_data: Dict[str, Any]) -> str:
+def compress_config(group_data: Dict[str, Any], version: int = CONFIG_CODEC_VERSION) -> str:
     """
     将一个群组的配置字典压缩成URL安全的字符串。
+    version 为编码版本（默认为 CONFIG_CODEC_VERSION），2 生成更短的二进制格式。
     """
     try:
+        if version == 2:
+            return _compress_v2(group_data)
+
         # 此设置在机器人端未使用，硬编码为0以兼容旧版
         show_offline_by_default = 0
         server_tree = group_data.get('servers', []) # 数据已经是树形结构，直接使用
@@ -127,8 +344,11 @@ def compress_config(group_data: Dict[str, Any]) -> str:
 def decompress_config(encoded_string: str) -> Dict[str, Any] | None:
     """
     将一个URL安全的字符串解压回群组的配置字典。
+    根据版本前缀自动识别格式，没有前缀的视为 v1。
     """
     try:
+        if encoded_string.startswith(V2_PREFIX):
+            return _decompress_v2(encoded_string)
         base64_bytes = _from_url_safe_base64(encoded_string)
         binary_string = base64.b64decode(base64_bytes)
         inflated = zlib.decompress(binary_string).decode('utf-8')
@@ -19,7 +19,7 @@ _current_dir = os.path.dirname(__file__)
 # 字体资源文件所在的文件夹路径
 FONTS_PATH = os.path.join(_current_dir, 'resources', 'fonts')
 
-# 生成的服务器状态图片最终保存的文件夹路径
+# 生成的服务器状态图片的保存路径（仅在开启 SAVE_IMAGE_TO_DISK 时使用）
 SAVE_IMG_DIR = os.path.join(_current_dir, 'data', 'images')
 
 # ==============================================================================
@@ -40,6 +40,7 @@ PING_COLOR_RED = (255, 85, 85, 255)  # Ping 值较高或服务器离线时显示
 TAG_DEFAULT_BACKGROUND = '#282828'  # 服务器 Tag 的默认背景色（十六进制字符串）
 TAG_TEXT_COLOR = (255, 255, 255, 255)  # Tag 内部文字的颜色，设计为白色以适应任何背景
 CONNECTOR_LINE_COLOR = (150, 150, 150, 255)  # 连接主服和子服的线条颜色
+ICON_PLACEHOLDER_COLOR = (40, 40, 40, 255)  # 服务器没有图标时，占位图标的背景色
 
 # --- MOTD 颜色代码映射 ---
 # 用于解析 Minecraft MOTD 中的颜色代码
@@ -105,6 +106,14 @@ DEFAULT_SERVER_PRIORITY = 100
 # 前端Web UI的基础URL，用于生成快捷导入链接
 WEB_UI_BASE_URL = "https://edit.flyingpig278.com/"
 
+# 导出配置时使用的编码版本：1 为 JSON + zlib（Web UI 目前只能解析该格式），2 为更短的二进制格式
+# 导入时两种格式都能识别，Web UI 支持 v2 后即可改为 2 以缩短编辑链接
+CONFIG_CODEC_VERSION = 1
+CONFIG_CODEC_ZDICT = True  # v2 编码时是否尝试使用已登记的预设字典压缩（结果更短时才会使用；目前没有登记任何字典）
+
+# 服务器状态查询API的地址（查询参数 query 为服务器地址）
+STATUS_API_URL = "https://mc.sjtu.cn/custom/serverlist/"
+
 # ==============================================================================
 # 5. 帮助文本 (Usage)
 # ==============================================================================
@@ -136,6 +145,64 @@ USAGE_ADMIN= """【Web编辑器 (推荐)】
 /mcs footer <文本>: 设置页脚文本
 /mcs footer clear: 清除页脚文本
 /mcs export_json: 导出原始JSON配置 (用于排查)
+/mcs stats: 查看渲染性能统计
+/mcs cache: 查看图片缓存统计
 ---
 【帮助】
 /mcs help: 查看本帮助信息"""
+
+# ==============================================================================
+# 6. 性能调优 (Performance Tuning)
+# ==============================================================================
+
+# --- 渲染执行池 ---
+# 图片渲染在独立的执行池中进行，避免阻塞 NoneBot 的事件循环
+# "thread": 线程池（默认，Pillow 的大部分绘图操作会释放 GIL）
+# "process": 进程池（需要系统支持 fork，否则自动回退到线程池）。使用进程池时需要注意：
+#   - 工作进程通过 fork 创建，fork 时其他线程持有的锁会以锁定状态被子进程继承，可能导致子进程死锁。
+#     插件启动时会先预热进程池、再启动图片缓存的维护线程，但无法避免其他插件或 NoneBot 自身已经启动的线程；
+#     进程池关闭后重新创建（或工作进程崩溃后重建）时也会在多线程的状态下 fork。Python 3.12 起会对此给出 DeprecationWarning
+#   - 行图块、图标精灵、文本测量等渲染缓存位于各工作进程中，/mcs stats 只能显示主进程中的统计（基本为空）
+RENDER_POOL_TYPE = "thread"
+RENDER_POOL_WORKERS = 2  # 执行池中的工作线程/进程数量
+
+# --- 图标预取 ---
+ICON_PREFETCH_CONCURRENCY = 16  # 渲染前并发下载/解码服务器图标的最大数量
+IMAGE_DOWNLOAD_MAX_BYTES = 1024 * 1024  # 单个图标下载的字节上限（按解压后的响应体计），超过时中止下载
+DATA_URI_CACHE_MAX_BYTES = 4 * 1024 * 1024  # 已解码的 Base64 数据URI图标的缓存上限（以数据URI的哈希为键，按解码后的字节数计）
+IMAGE_MEMORY_CACHE_MAX_BYTES = 8 * 1024 * 1024  # 已下载图片的内存缓存上限（位于磁盘缓存之前，按原始字节数计）
+IMAGE_DISK_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 已下载图片的磁盘缓存上限（存活条目的字节数），超出时淘汰最久未使用的条目
+IMAGE_CACHE_SWEEP_INTERVAL = 10 * 60  # 后台清理过期磁盘缓存（并在需要时压缩数据文件）的间隔（秒）
+IMAGE_CACHE_COMPACT_RATIO = 0.5  # 数据文件中失效记录的占比达到该值时，在后台清理时压缩数据文件
+IMAGE_CACHE_COMPACT_MIN_BYTES = 1024 * 1024  # 失效记录少于该字节数时不压缩
+IMAGE_CACHE_REVALIDATE_WINDOW = 24 * 60 * 60  # 带有 ETag/Last-Modified 的图片过期后仍保留、用于条件请求重新验证的时长（秒）
+
+# --- 渲染缓存 ---
+ICON_SPRITE_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 已缩放图标精灵缓存的像素字节上限（每个 80x80 图标约 25KB）
+ROW_TILE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 服务器行图块缓存的像素字节上限（图块裁剪为绘制区域的 RGB，每行约 250~350KB，可容纳约 200 行）
+CHROME_FOOTER_CACHE_SIZE = 32  # 预渲染的标题栏/页脚图层缓存数量（按标题、页脚文本与宽度区分）
+TEXT_METRICS_CACHE_SIZE = 4096  # 文本测量（宽度/包围盒）缓存的最大条目数，按 (字体, 文本) 区分
+MOTD_RUN_CACHE_SIZE = 1024  # 已解析 MOTD 颜色段的缓存条目数
+
+# --- 图片输出编码 ---
+# 可选值（体积/耗时对比可运行 benchmarks/bench_encode.py 测试）：
+# "png": 标准 PNG（默认）
+# "png_quantized": 调色板量化 PNG，体积最小之一，文字边缘会有轻微色阶
+# "webp_lossless": 无损 WebP
+# "jpeg": 高质量 JPEG（本插件的图片以纯色和文字为主，JPEG 通常反而比 PNG 更大）
+IMAGE_OUTPUT_FORMAT = "png"
+PNG_COMPRESS_LEVEL = 6  # PNG 的 zlib 压缩等级 (0-9)，越大越小但越慢
+PNG_QUANTIZE_COLORS = 256  # 量化 PNG 的调色板颜色数 (2-256)
+WEBP_METHOD = 4  # WebP 编码方法 (0-6)，越大越小但越慢
+WEBP_EFFORT = 80  # 无损 WebP 的压缩力度 (0-100)
+JPEG_QUALITY = 90  # JPEG 质量 (1-95)
+
+# --- 分页与多列布局 ---
+# 服务器很多时，单张长图绘制/编码都很慢，QQ 客户端也会将其压缩得难以辨认
+MAX_PAGE_HEIGHT = 5000  # 每页图片的最大高度，超出时在子树边界处分页，多页图片以合并转发消息发送
+LAYOUT_COLUMNS = 1  # 每页并排显示的列数，设为 2 即为双列布局（图片宽度随之加倍）
+
+# --- 图片发送 ---
+# 图片默认直接以内存数据（base64）发送，不经过磁盘
+SAVE_IMAGE_TO_DISK = False  # 是否额外将生成的图片保存到 SAVE_IMG_DIR（用于排查）
+SAVED_IMAGE_MAX_FILES = 50  # 磁盘上最多保留的图片数量，超出时删除最旧的
@@ -1,111 +1,190 @@
+import asyncio
 import base64
+import binascii
 import hashlib
-import re
-import time
 from io import BytesIO
-from pathlib import Path
-from typing import Union
+from typing import Any, Dict, Optional, Union
 
 import httpx
 
-# 缓存配置
-SCRIPT_DIR = Path(__file__).resolve().parent
-CACHE_DIR = SCRIPT_DIR / "image_cache"
-CACHE_TTL = 60 * 60  # 缓存有效期：60分钟（秒）
-CACHE_DIR.mkdir(exist_ok=True)
+from .bounded_cache import BoundedLRUCache
+from .constants import IMAGE_MEMORY_CACHE_MAX_BYTES, IMAGE_DOWNLOAD_MAX_BYTES, DATA_URI_CACHE_MAX_BYTES
+from .disk_cache import (CACHE_TTL, Validators, get_cache_key, read_from_cache, refresh_cache_entry,
+                         write_to_cache)
 
-def get_cache_path(url: str) -> Path:
-    """生成缓存文件路径（使用URL的SHA256哈希）"""
-    url_hash = hashlib.sha256(url.encode()).hexdigest()
-    return CACHE_DIR / f"{url_hash}.cache"
+# 磁盘缓存之前的内存缓存：以URL为键，值为图片的原始字节，过期时间与磁盘缓存一致
+_memory_cache = BoundedLRUCache(IMAGE_MEMORY_CACHE_MAX_BYTES, sizeof=len, ttl=CACHE_TTL)
 
+# 已解码的 Base64 数据URI：以数据URI的哈希为键，同一个图标在每次查询中都会原样返回，只需解码一次
+_data_uri_cache = BoundedLRUCache(DATA_URI_CACHE_MAX_BYTES, sizeof=len)
 
-def is_cache_valid(cache_path: Path) -> bool:
-    """检查缓存是否有效（存在且未过期）"""
-    if not cache_path.exists():
-        return False
+_DATA_URI_PREFIX = "data:image/"
+_BASE64_MARKER = ";base64,"
 
-    # 检查文件修改时间
-    file_age = time.time() - cache_path.stat().st_mtime
-    return file_age < CACHE_TTL
+# 支持的图片格式的文件头，下载时收到前几个字节后即检查，不是图片的响应会立即中止
+_IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF87a",
+    b"GIF89a",
+    b"BM",  # BMP
+    b"\x00\x00\x01\x00",  # ICO
+)
+_SNIFF_BYTES = 12
 
+# 正在进行中的加载任务（以URL为键），同一URL的并发请求共享同一次下载与缓存写入
+_inflight: Dict[str, "asyncio.Task[Optional[bytes]]"] = {}
 
-def read_from_cache(cache_path: Path) -> Union[None, BytesIO]:
-    """从缓存读取图片数据"""
-    try:
-        with open(cache_path, "rb") as f:
-            print(f"使用缓存图片: {cache_path.name}")
-            return BytesIO(f.read())
-    except IOError as e:
-        print(f"读取缓存失败 {cache_path}: {e}")
-        return None
 
+async def download_image_with_cache(url: str) -> Union[None, BytesIO]:
+    """下载图片并使用缓存（先查内存缓存，再查磁盘缓存）"""
+    # 1. 检查内存缓存（不涉及任何系统调用）
+    image_data = _memory_cache.get(url)
+    if image_data is not None:
+        return BytesIO(image_data)
+
+    # 2. 同一URL同时只进行一次加载，其他调用方等待同一个任务
+    task = _inflight.get(url)
+    if task is None:
+        task = asyncio.ensure_future(_load_image(url))
+        _inflight[url] = task
+        task.add_done_callback(lambda _: _inflight.pop(url, None))
+
+    # 某个调用方被取消时不能取消共享的加载任务
+    image_data = await asyncio.shield(task)
+    return BytesIO(image_data) if image_data else None
+
+
+def _conditional_headers(validators: Optional[Validators]) -> Dict[str, str]:
+    """根据缓存条目的校验信息构造条件请求头。"""
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _response_validators(response: httpx.Response) -> Optional[Validators]:
+    """提取响应中的 ETag / Last-Modified，都没有时返回 None。"""
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return {key: value for key, value in validators.items() if value} or None
 
-def write_to_cache(cache_path: Path, data: bytes) -> bool:
-    """将图片数据写入缓存（使用原子重命名确保完整性）"""
-    temp_path = cache_path.with_suffix(".tmp")
-    try:
-        # 1. 写入临时文件
-        temp_path.write_bytes(data)
 
-        # 2. 原子性重命名
-        temp_path.replace(cache_path)
-        print(f"已缓存图片: {cache_path.name}")
+def _is_image_header(head: bytes) -> bool:
+    """根据文件头判断数据是否为支持的图片格式。"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
         return True
-    except IOError as e:
-        print(f"写入缓存失败 {cache_path}: {e}")
-        # 清理可能的临时文件
-        temp_path.unlink(missing_ok=True)
-        return False
+    return head.startswith(_IMAGE_SIGNATURES)
 
 
-async def download_image_with_cache(url: str) -> Union[None, BytesIO]:
-    """下载图片并使用缓存"""
-    cache_path = get_cache_path(url)
+async def _read_image_body(url: str, response: httpx.Response) -> Optional[bytes]:
+    """
+    流式读取图片响应体，不符合要求时立即中止下载并返回 None：
+    Content-Type 不是图片、Content-Length 或已收到的字节数超过 IMAGE_DOWNLOAD_MAX_BYTES、文件头不是支持的图片格式。
+    """
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and not content_type.startswith("image/") and content_type != "application/octet-stream":
+        print(f"图片URL返回了非图片内容 {url}: {content_type}")
+        return None
+    content_length = response.headers.get("Content-Length", "")
+    if content_length.isdigit() and int(content_length) > IMAGE_DOWNLOAD_MAX_BYTES:
+        print(f"图片过大 {url}: {content_length} 字节")
+        return None
 
-    # 1. 检查缓存是否有效
-    if is_cache_valid(cache_path):
-        cached_data = read_from_cache(cache_path)
-        if cached_data:
+    body = bytearray()
+    sniffed = False
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) > IMAGE_DOWNLOAD_MAX_BYTES:
+            print(f"图片过大 {url}: 超过 {IMAGE_DOWNLOAD_MAX_BYTES} 字节")
+            return None
+        if not sniffed and len(body) >= _SNIFF_BYTES:
+            if not _is_image_header(body[:_SNIFF_BYTES]):
+                print(f"图片URL返回的数据不是支持的图片格式 {url}")
+                return None
+            sniffed = True
+    if not sniffed and not _is_image_header(bytes(body)):
+        print(f"图片URL返回的数据不是支持的图片格式 {url}")
+        return None
+    return bytes(body)
+
+
+async def _load_image(url: str) -> Optional[bytes]:
+    """从磁盘缓存或网络加载图片，并放入内存缓存。每个URL同时只会有一个该任务在执行。"""
+    # 1. 检查磁盘缓存（在线程中进行，不阻塞事件循环），有效时放入内存缓存（沿用文件的修改时间，保证过期时间一致）
+    cache_key = get_cache_key(url)
+    cached = await asyncio.to_thread(read_from_cache, cache_key)
+    cached_data, validators = None, None
+    if cached:
+        cached_data, cached_at, validators = cached
+        if validators is None:
+            _memory_cache.put(url, cached_data, created_at=cached_at)
             return cached_data
 
-    # 2. 缓存无效或不存在，从网络下载
+    # 2. 缓存不存在，或已过期但带有校验信息（发送条件请求重新验证）
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=5.0)
-            response.raise_for_status()
-            image_data = response.content
-
-            # 3. 保存到缓存
-            write_to_cache(cache_path, image_data)
-
-            return BytesIO(image_data)
+            async with client.stream("GET", url, timeout=5.0, headers=_conditional_headers(validators)) as response:
+                # 3. 图片未变化：只刷新缓存时间，不重新下载
+                if response.status_code == 304 and cached_data is not None:
+                    cached_at = await asyncio.to_thread(
+                        refresh_cache_entry, cache_key, _response_validators(response) or validators)
+                    _memory_cache.put(url, cached_data, created_at=cached_at)
+                    return cached_data
+
+                response.raise_for_status()
+                # 流式读取，过大或不是图片时提前中止（退出上下文即关闭连接）
+                image_data = await _read_image_body(url, response)
+                if image_data is None:
+                    return cached_data
+
+        # 4. 保存到内存缓存与磁盘缓存（写入磁盘在线程中进行）
+        _memory_cache.put(url, image_data)
+        await asyncio.to_thread(write_to_cache, cache_key, image_data, _response_validators(response))
+
+        return image_data
+    # 重新验证失败时仍可使用过期的缓存
     except httpx.RequestError as e:
         print(f"下载图片失败 {url}: {e}")
-        return None
+        return cached_data
     except Exception as e:
         print(f"处理图片URL时发生错误 {url}: {e}")
-        return None
+        return cached_data
 
 
 def decode_base64_data(data_uri: str) -> Union[None, BytesIO]:
-    """解码Base64数据URI"""
-    match = re.search(r"data:image/(?P<ext>.*?);base64,(?P<data>.*)", data_uri, re.DOTALL)
-    if not match:
+    """解码Base64数据URI（解码结果以数据URI的哈希为键缓存）"""
+    if not data_uri.startswith(_DATA_URI_PREFIX):
+        return None
+    marker = data_uri.find(_BASE64_MARKER, len(_DATA_URI_PREFIX))
+    if marker < 0:
         return None
 
-    try:
-        data = match.groupdict().get("data")
-        if not data:
-            print("Base64数据为空")
-            return None
-
-        decoded_data = base64.b64decode(data)
-        return BytesIO(decoded_data)
-    except ValueError as e:
-        print(f"Base64解码失败: {e}")
+    data_start = marker + len(_BASE64_MARKER)
+    if data_start == len(data_uri):
+        print("Base64数据为空")
+        return None
+    # Base64 每 4 个字符解码为 3 个字节，超出下载上限的数据URI不解码
+    if (len(data_uri) - data_start) // 4 * 3 > IMAGE_DOWNLOAD_MAX_BYTES:
+        print(f"Base64图片过大: 超过 {IMAGE_DOWNLOAD_MAX_BYTES} 字节")
         return None
 
+    key = hashlib.sha1(data_uri.encode()).digest()
+    decoded_data = _data_uri_cache.get(key)
+    if decoded_data is None:
+        try:
+            decoded_data = base64.b64decode(data_uri[data_start:])
+        except (binascii.Error, ValueError) as e:
+            print(f"Base64解码失败: {e}")
+            return None
+        _data_uri_cache.put(key, decoded_data)
+    return BytesIO(decoded_data)
+
 
 async def decode_image(src: str) -> Union[None, BytesIO]:
     """
@@ -113,44 +192,18 @@ async def decode_image(src: str) -> Union[None, BytesIO]:
     对URL使用缓存，有效期60分钟
     """
     # 1. 检查是否是Base64数据URI
-    if src.startswith("data:image/"):
+    if src.startswith(_DATA_URI_PREFIX):
         return decode_base64_data(src)
 
     # 2. 处理URL（使用缓存）
     return await download_image_with_cache(src)
 
 
-# 缓存管理功能
-def cleanup_expired_cache():
-    """清理过期的缓存文件"""
-    current_time = time.time()
-    removed_count = 0
-
-    for cache_file in CACHE_DIR.glob("*.cache"):
-        file_age = current_time - cache_file.stat().st_mtime
-        if file_age > CACHE_TTL:
-            try:
-                cache_file.unlink()
-                removed_count += 1
-            except IOError as e:
-                print(f"删除缓存文件失败 {cache_file}: {e}")
-
-    if removed_count > 0:
-        print(f"清理了 {removed_count} 个过期缓存文件")
-
-
-def get_cache_stats():
-    """获取缓存统计信息"""
-    cache_files = list(CACHE_DIR.glob("*.cache"))
-    total_size = sum(f.stat().st_size for f in cache_files)
-    valid_files = [f for f in cache_files if is_cache_valid(f)]
-
-    return {
-        "total_files": len(cache_files),
-        "valid_files": len(valid_files),
-        "total_size": total_size,
-        "total_size_mb": total_size / (1024 * 1024)
-    }
+def get_memory_cache_stats() -> Dict[str, Any]:
+    """获取图片内存缓存的统计信息。"""
+    return _memory_cache.stats()
+
 
-# 在模块加载时执行一次清理
-cleanup_expired_cache()
\ No newline at end of file
+def get_data_uri_cache_stats() -> Dict[str, Any]:
+    """获取Base64数据URI解码缓存的统计信息。"""
+    return _data_uri_cache.stats()
@@ -0,0 +1,498 @@
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from .constants import (IMAGE_DISK_CACHE_MAX_BYTES, IMAGE_CACHE_REVALIDATE_WINDOW, IMAGE_CACHE_COMPACT_RATIO,
+                        IMAGE_CACHE_COMPACT_MIN_BYTES)
+
+# 缓存配置
+SCRIPT_DIR = Path(__file__).resolve().parent
+CACHE_DIR = SCRIPT_DIR / "image_cache"
+CACHE_TTL = 60 * 60  # 缓存有效期：60分钟（秒）
+
+# 所有图片保存在同一个只追加写入的数据文件中，每条记录为：记录头 + 图片数据 + 校验信息（JSON）
+# 记录头带有 URL 哈希、缓存时间、长度与 CRC32，即使索引快照丢失或写入中途崩溃，也能从数据文件恢复索引并截掉残缺的记录
+# 索引快照保存条目在数据文件中的位置，启动时只需读取快照并扫描快照之后追加的记录
+# 崩溃后的恢复：新记录写入后只 flush 不 fsync（缓存数据丢失只需重新下载），但写入快照前会先 fsync 数据文件，
+# 因此快照覆盖的部分一定已落盘。启动时快照无效（不存在、校验失败、代号不符或覆盖范围超出数据文件长度）则扫描整个数据文件；
+# 扫描遇到残缺或 CRC 校验失败的记录即停止，并将数据文件截断到最后一条有效记录的末尾，此后的记录视为丢失
+PACK_NAME = "icons.pack"
+INDEX_NAME = "icons.idx"
+_PACK_MAGIC = b"XIPK"
+_RECORD_MAGIC = b"XIRC"
+_INDEX_MAGIC = b"XIIX"
+_PACK_HEADER = struct.Struct("<4sQ")  # 魔数, 数据文件代号（每次压缩后重新生成，用于判断索引快照是否对应当前数据文件）
+_RECORD_HEADER = struct.Struct("<4s32sdIII")  # 魔数, URL 哈希, 缓存时间, 数据长度, 校验信息长度, CRC32
+_INDEX_HEADER = struct.Struct("<4sQQI")  # 魔数, 数据文件代号, 快照覆盖的数据文件长度, 条目数
+_INDEX_ENTRY = struct.Struct("<32sQIIdH")  # URL 哈希, 数据偏移, 数据长度, 记录长度, 缓存时间, 校验信息长度
+_CRC = struct.Struct("<I")
+
+# 缓存条目的校验信息（ETag / Last-Modified）
+# 带有校验信息的条目过期后仍会保留 IMAGE_CACHE_REVALIDATE_WINDOW 秒，用于发送条件请求重新验证
+Validators = Dict[str, str]
+
+# 缓存索引：URL 哈希 -> (数据偏移, 数据长度, 记录长度, 缓存时间戳, 校验信息)，按最近使用的顺序排列（最久未使用的在最前）
+# 过期清理、容量淘汰与统计都只查询索引；被移除的条目只是变成数据文件中的失效记录，由压缩回收空间
+_index: "OrderedDict[bytes, Tuple[int, int, int, float, Optional[Validators]]]" = OrderedDict()
+_index_bytes = 0  # 存活条目的记录总长度
+_lock = threading.Lock()
+
+# 数据文件状态（均需持有 _lock 访问）
+_pack: Optional[BinaryIO] = None
+# 只读内存映射：读取图片时从中切片，不需要额外的 open/read 系统调用
+# 切片会复制出一份独立的 bytes（不是零拷贝）：图标需要放入内存缓存、包装为 BytesIO 并序列化传给渲染进程，
+# 这些环节本身都需要 bytes；返回独立的 bytes 也使压缩与关闭时可以随时重新映射或关闭文件，不会被外部持有的视图阻塞
+_pack_map: Optional[mmap.mmap] = None
+_pack_generation = 0
+_pack_size = 0  # 有效记录的末尾位置（新记录从这里追加）
+_dirty = False  # 索引是否有尚未写入快照的变化
+
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "writes": 0,
+    "evictions": 0,
+    "expirations": 0,
+    "revalidations": 0,
+    "compactions": 0,
+}
+
+
+def get_cache_key(url: str) -> bytes:
+    """生成缓存键（URL的SHA256哈希）"""
+    return hashlib.sha256(url.encode()).digest()
+
+
+def _is_removable(cached_at: float, revalidatable: bool, now: float) -> bool:
+    """条目是否可以删除：已过期且不能重新验证，或者已超出重新验证的保留期。"""
+    age = now - cached_at
+    return age >= CACHE_TTL + IMAGE_CACHE_REVALIDATE_WINDOW or (age >= CACHE_TTL and not revalidatable)
+
+
+def _encode_record(key: bytes, data: bytes, validators: Optional[Validators], cached_at: float) -> bytes:
+    meta = json.dumps(validators).encode("utf-8") if validators else b""
+    crc = zlib.crc32(meta, zlib.crc32(data, zlib.crc32(key + struct.pack("<d", cached_at))))
+    return _RECORD_HEADER.pack(_RECORD_MAGIC, key, cached_at, len(data), len(meta), crc) + data + meta
+
+
+def _scan_records(buf: mmap.mmap, start: int, end: int):
+    """
+    从 start 开始逐条校验数据文件中的记录，返回 (记录列表, 最后一条有效记录的末尾位置)。
+    遇到残缺或校验失败的记录（写入中途崩溃）时停止。
+    """
+    records = []
+    position = start
+    while position + _RECORD_HEADER.size <= end:
+        magic, key, cached_at, size, meta_len, crc = _RECORD_HEADER.unpack_from(buf, position)
+        data_offset = position + _RECORD_HEADER.size
+        record_end = data_offset + size + meta_len
+        if magic != _RECORD_MAGIC or record_end > end:
+            break
+        data = buf[data_offset:data_offset + size]
+        meta = buf[data_offset + size:record_end]
+        if zlib.crc32(meta, zlib.crc32(data, zlib.crc32(key + struct.pack("<d", cached_at)))) != crc:
+            break
+        try:
+            validators = json.loads(meta) if meta else None
+        except ValueError:
+            validators = None
+        records.append((key, (data_offset, size, record_end - position, cached_at, validators)))
+        position = record_end
+    return records, position
+
+
+# --- 索引维护（调用方需持有 _lock） ---
+
+def _index_put(key: bytes, entry: Tuple[int, int, int, float, Optional[Validators]]):
+    global _index_bytes
+    _index_remove(key)
+    _index[key] = entry
+    _index_bytes += entry[2]
+
+
+def _index_remove(key: bytes) -> bool:
+    global _index_bytes
+    entry = _index.pop(key, None)
+    if entry is None:
+        return False
+    _index_bytes -= entry[2]
+    return True
+
+
+def _index_clear():
+    global _index_bytes
+    _index.clear()
+    _index_bytes = 0
+
+
+def _pop_over_budget() -> int:
+    """按最久未使用的顺序从索引中移除条目，直到总大小不超过预算，返回被移除的条目数。"""
+    count = 0
+    while _index_bytes > IMAGE_DISK_CACHE_MAX_BYTES and _index:
+        _index_remove(next(iter(_index)))
+        count += 1
+    return count
+
+
+def _pop_expired(now: float) -> int:
+    """从索引中移除所有可以删除的过期条目，返回被移除的条目数。"""
+    expired = [key for key, (_, _, _, cached_at, validators) in _index.items()
+               if _is_removable(cached_at, validators is not None, now)]
+    for key in expired:
+        _index_remove(key)
+    return len(expired)
+
+
+# --- 数据文件与索引快照（调用方需持有 _lock） ---
+
+def _remap():
+    global _pack_map
+    if _pack_map is not None:
+        _pack_map.close()
+    _pack_map = mmap.mmap(_pack.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _create_pack(path: Path, generation: int) -> BinaryIO:
+    pack = open(path, "w+b")
+    pack.write(_PACK_HEADER.pack(_PACK_MAGIC, generation))
+    pack.flush()
+    pack.seek(0)
+    return pack
+
+
+def _load_index_snapshot(pack_size: int) -> Optional[int]:
+    """读取索引快照，快照有效且对应当前数据文件时载入索引并返回快照覆盖的数据文件长度，否则返回 None。"""
+    try:
+        payload = (CACHE_DIR / INDEX_NAME).read_bytes()
+    except OSError:
+        return None
+    if len(payload) < _INDEX_HEADER.size + _CRC.size:
+        return None
+    body, (crc,) = payload[:-_CRC.size], _CRC.unpack_from(payload, len(payload) - _CRC.size)
+    magic, generation, covered, count = _INDEX_HEADER.unpack_from(body)
+    if zlib.crc32(body) != crc or magic != _INDEX_MAGIC or generation != _pack_generation or covered > pack_size:
+        return None
+
+    entries = []
+    position = _INDEX_HEADER.size
+    try:
+        for _ in range(count):
+            key, offset, size, record_size, cached_at, meta_len = _INDEX_ENTRY.unpack_from(body, position)
+            position += _INDEX_ENTRY.size
+            meta = body[position:position + meta_len]
+            position += meta_len
+            entries.append((key, (offset, size, record_size, cached_at, json.loads(meta) if meta else None)))
+    except (struct.error, ValueError):
+        return None
+    for key, entry in entries:
+        _index_put(key, entry)
+    return covered
+
+
+def _save_index_snapshot():
+    """将索引（按最近使用的顺序）原子性地写入快照文件。"""
+    global _dirty
+    parts = [_INDEX_HEADER.pack(_INDEX_MAGIC, _pack_generation, _pack_size, len(_index))]
+    for key, (offset, size, record_size, cached_at, validators) in _index.items():
+        meta = json.dumps(validators).encode("utf-8") if validators else b""
+        parts.append(_INDEX_ENTRY.pack(key, offset, size, record_size, cached_at, len(meta)))
+        parts.append(meta)
+    body = b"".join(parts)
+
+    index_path = CACHE_DIR / INDEX_NAME
+    temp_path = index_path.with_name(f"{INDEX_NAME}.tmp")
+    try:
+        # 快照引用的记录必须先落盘，否则崩溃后快照可能指向不完整的数据
+        _pack.flush()
+        os.fsync(_pack.fileno())
+        with open(temp_path, "wb") as f:
+            f.write(body + _CRC.pack(zlib.crc32(body)))
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(index_path)
+        _dirty = False
+    except IOError as e:
+        print(f"写入缓存索引失败 {index_path}: {e}")
+        temp_path.unlink(missing_ok=True)
+
+
+def _open_store():
+    """打开（必要时创建）数据文件并载入索引。数据文件已打开时直接返回。"""
+    global _pack, _pack_generation, _pack_size, _dirty
+    if _pack is not None:
+        return
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    pack_path = CACHE_DIR / PACK_NAME
+    try:
+        pack = open(pack_path, "r+b")
+    except FileNotFoundError:
+        pack = _create_pack(pack_path, int.from_bytes(os.urandom(8), "little"))
+    header = pack.read(_PACK_HEADER.size)
+    if len(header) < _PACK_HEADER.size or header[:4] != _PACK_MAGIC:
+        print(f"缓存数据文件已损坏，重新创建: {pack_path}")
+        pack.close()
+        pack = _create_pack(pack_path, int.from_bytes(os.urandom(8), "little"))
+        header = pack.read(_PACK_HEADER.size)
+    _pack, _pack_generation = pack, _PACK_HEADER.unpack(header)[1]
+    file_size = os.fstat(pack.fileno()).st_size
+    _remap()
+
+    # 先载入索引快照，再扫描快照之后追加的记录（快照无效时扫描整个数据文件），同一URL以最后一条记录为准
+    _index_clear()
+    covered = _load_index_snapshot(file_size)
+    start = _PACK_HEADER.size if covered is None else covered
+    records, _pack_size = _scan_records(_pack_map, start, file_size)
+    now = time.time()
+    for key, entry in records:
+        if _is_removable(entry[3], entry[4] is not None, now):
+            _index_remove(key)
+        else:
+            _index_put(key, entry)
+    _dirty = covered is None or bool(records)
+
+    if _pack_size < file_size:
+        # 截掉写入中途崩溃而残留的不完整记录，之后的记录从有效末尾继续追加
+        print(f"缓存数据文件末尾有 {file_size - _pack_size} 字节不完整的记录，已截断")
+        _pack_map.close()
+        pack.truncate(_pack_size)
+        _remap()
+
+
+def _close_store():
+    global _pack, _pack_map
+    if _pack_map is not None:
+        _pack_map.close()
+        _pack_map = None
+    if _pack is not None:
+        _pack.close()
+        _pack = None
+
+
+def _dead_bytes() -> int:
+    return _pack_size - _PACK_HEADER.size - _index_bytes
+
+
+def _compact():
+    """将所有存活条目（按最近使用的顺序）写入新的数据文件并原子性替换，回收失效记录占用的空间。"""
+    global _pack, _pack_generation, _pack_size
+    pack_path = CACHE_DIR / PACK_NAME
+    temp_path = pack_path.with_name(f"{PACK_NAME}.tmp")
+    generation = int.from_bytes(os.urandom(8), "little")
+    compacted = []
+    if len(_pack_map) < _pack_size:
+        _remap()
+    try:
+        with open(temp_path, "wb") as out:
+            out.write(_PACK_HEADER.pack(_PACK_MAGIC, generation))
+            position = _PACK_HEADER.size
+            for key, (offset, size, _, cached_at, validators) in _index.items():
+                record = _encode_record(key, _pack_map[offset:offset + size], validators, cached_at)
+                out.write(record)
+                compacted.append((key, (position + _RECORD_HEADER.size, size, len(record), cached_at, validators)))
+                position += len(record)
+            # 替换前确保新数据文件已落盘，替换后即使在写入索引快照前崩溃，也能通过扫描新数据文件恢复
+            out.flush()
+            os.fsync(out.fileno())
+        _close_store()
+        temp_path.replace(pack_path)
+    except IOError as e:
+        print(f"压缩缓存数据文件失败: {e}")
+        temp_path.unlink(missing_ok=True)
+        if _pack is None:
+            _open_store()
+        return
+
+    _pack = open(pack_path, "r+b")
+    _pack_generation, _pack_size = generation, position
+    _remap()
+    _index_clear()
+    for key, entry in compacted:
+        _index_put(key, entry)
+    _stats["compactions"] += 1
+    _save_index_snapshot()
+
+
+# --- 读写（会阻塞，应在线程中调用） ---
+
+def is_cache_valid(key: bytes) -> bool:
+    """检查缓存是否有效（存在且未过期）"""
+    with _lock:
+        entry = _index.get(key)
+    return entry is not None and time.time() - entry[3] < CACHE_TTL
+
+
+def read_from_cache(key: bytes) -> Optional[Tuple[bytes, float, Optional[Validators]]]:
+    """
+    读取缓存图片，返回 (图片数据, 缓存时间戳, 校验信息)；缓存不存在或已无法使用时返回 None。
+    未过期的条目不返回校验信息（为 None）；已过期但带有校验信息的条目仍会返回，由调用方发送条件请求重新验证。
+    图片数据从数据文件的内存映射中切片复制得到（独立的 bytes，不引用映射）。会阻塞，应在线程中调用。
+    """
+    global _dirty
+    now = time.time()
+    with _lock:
+        try:
+            _open_store()
+        except OSError as e:
+            print(f"打开缓存数据文件失败: {e}")
+            _stats["misses"] += 1
+            return None
+
+        entry = _index.get(key)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        offset, size, _, cached_at, validators = entry
+        if _is_removable(cached_at, validators is not None, now):
+            _index_remove(key)
+            _stats["misses"] += 1
+            _stats["expirations"] += 1
+            _dirty = True
+            return None
+
+        if offset + size > len(_pack_map):
+            _remap()
+        data = _pack_map[offset:offset + size]
+        _index.move_to_end(key)
+        if now - cached_at < CACHE_TTL:
+            _stats["hits"] += 1
+            return data, cached_at, None
+        _stats["misses"] += 1
+        return data, cached_at, validators
+
+
+def write_to_cache(key: bytes, data: bytes, validators: Optional[Validators] = None) -> bool:
+    """
+    将图片数据（以及响应中的 ETag / Last-Modified 校验信息）作为一条新记录追加到数据文件。
+    写入后缓存总大小超过 IMAGE_DISK_CACHE_MAX_BYTES 时，淘汰最久未使用的条目；
+    失效记录过多（数据文件超过缓存上限的两倍）时立即压缩数据文件。
+    新记录只 flush 不 fsync，在下一次保存索引快照前崩溃可能丢失，启动时会通过扫描截掉残缺的记录。会阻塞，应在线程中调用。
+    """
+    global _pack_size, _dirty
+    cached_at = time.time()
+    record = _encode_record(key, data, validators, cached_at)
+    with _lock:
+        try:
+            _open_store()
+            # 从有效末尾写入：上一次写入失败留下的残缺内容会被覆盖
+            _pack.seek(_pack_size)
+            _pack.write(record)
+            _pack.flush()
+        except IOError as e:
+            print(f"写入缓存失败: {e}")
+            return False
+
+        _index_put(key, (_pack_size + _RECORD_HEADER.size, len(data), len(record), cached_at, validators))
+        _pack_size += len(record)
+        _dirty = True
+        _stats["writes"] += 1
+        _stats["evictions"] += _pop_over_budget()
+        if _pack_size > 2 * IMAGE_DISK_CACHE_MAX_BYTES:
+            _compact()
+    return True
+
+
+def refresh_cache_entry(key: bytes, validators: Optional[Validators]) -> float:
+    """
+    条件请求返回 304 后刷新条目：重置缓存时间，并记录服务器返回的最新校验信息（只修改索引，不重写图片数据）。
+    返回新的缓存时间戳。
+    """
+    global _dirty
+    now = time.time()
+    with _lock:
+        entry = _index.get(key)
+        if entry is not None:
+            offset, size, record_size, _, _ = entry
+            _index_put(key, (offset, size, record_size, now, validators))
+            _stats["revalidations"] += 1
+            _dirty = True
+    return now
+
+
+# --- 维护 ---
+
+def _remove_stale_files() -> int:
+    """删除旧版本每个URL一个文件的缓存（*.cache / *.meta），以及写入中途崩溃而遗留的临时文件（调用方需持有 _lock）。"""
+    removed = 0
+    with os.scandir(CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith((".cache", ".meta", ".tmp")):
+                try:
+                    os.unlink(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+def sweep_cache() -> int:
+    """
+    根据索引移除无法再使用的过期条目并执行容量淘汰，失效记录过多时压缩数据文件，最后保存索引快照。
+    返回移除的条目数。会阻塞，应在线程中调用。
+    """
+    with _lock:
+        _open_store()
+        expired = _pop_expired(time.time())
+        evicted = _pop_over_budget()
+        _stats["expirations"] += expired
+        _stats["evictions"] += evicted
+        dead = _dead_bytes()
+        if dead >= IMAGE_CACHE_COMPACT_MIN_BYTES and dead >= _pack_size * IMAGE_CACHE_COMPACT_RATIO:
+            _compact()
+        elif _dirty or expired or evicted:
+            _save_index_snapshot()
+    return expired + evicted
+
+
+async def run_cache_sweeper(interval: float):
+    """后台清理任务：每隔 interval 秒在线程中执行一次 sweep_cache。"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(sweep_cache)
+        except Exception as e:
+            print(f"清理图片缓存失败: {e}")
+
+
+def prepare_cache_dir():
+    """
+    创建缓存目录、打开数据文件并载入索引（同时清理旧版本的缓存文件、遗留的临时文件与过期条目）。
+    涉及目录扫描，由插件的启动任务在后台线程中调用。
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+    with _lock:
+        removed = _remove_stale_files()
+    if removed:
+        print(f"清理了 {removed} 个过期缓存文件")
+    sweep_cache()
+
+
+def close_cache():
+    """保存索引快照并关闭数据文件（插件关闭时调用）。会阻塞，应在线程中调用。"""
+    with _lock:
+        if _pack is not None and _dirty:
+            _save_index_snapshot()
+        _close_store()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """获取磁盘缓存的统计信息（只读取索引，不访问磁盘）。"""
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": _stats["hits"] / total if total else 0.0,
+            "entries": len(_index),
+            "bytes": _index_bytes,
+            "pack_bytes": _pack_size,
+            "max_bytes": IMAGE_DISK_CACHE_MAX_BYTES,
+        }
@@ -1,116 +1,114 @@
-import re
-from typing import Tuple
+from functools import lru_cache
+from typing import Tuple, Union
 
 from PIL import ImageDraw, ImageFont, ImageColor
 
-from xducraft_bot.plugins.xducraft_mc_status.constants import MINECRAFT_COLOR_CODES, HTML_COLOR_CODES
+from xducraft_bot.plugins.xducraft_mc_status.constants import MINECRAFT_COLOR_CODES, HTML_COLOR_CODES, \
+    PRIMARY_TEXT_COLOR, MOTD_RUN_CACHE_SIZE
+from xducraft_bot.plugins.xducraft_mc_status.text_metrics import text_length
 
+Color = Tuple[int, ...]
+# 一段颜色相同的文本：(文本, 颜色, 像素宽度)
+TextRun = Tuple[str, Color, float]
 
-def draw_colored_title(draw: ImageDraw.ImageDraw,
-                       text: str,
-                       position: Tuple[int, float],
-                       font: ImageFont.FreeTypeFont,
-                       default_color: Tuple[int, int, int, int] = (255, 255, 255, 255)):
-    x, y = position
-    current_color = default_color
-    buffer_text = ''
-    i = 0
-    while i < len(text):
-        if text[i] == '§':
-            if buffer_text:
-                draw.text((x, y), buffer_text, fill=current_color, font=font,anchor="lm")
-                size = draw.textlength(buffer_text, font=font)
-                x += size
-                buffer_text = ''
-            if i + 1 < len(text) and text[i + 1].lower() in MINECRAFT_COLOR_CODES:
-                current_color = MINECRAFT_COLOR_CODES.get(text[i + 1].lower(), default_color)
-            i += 2
-        else:
-            buffer_text += text[i]
-            i += 1
-    if buffer_text:
-        draw.text((x, y), buffer_text, fill=current_color, font=font,anchor="lm")
+_FONT_TAG_PREFIX = '<font color="'
+_FONT_TAG_SUFFIX = '">'
 
 
-def draw_colored_title_html(draw: ImageDraw.ImageDraw,
-                            text: str,
-                            position: Tuple[int, float],
-                            font: ImageFont.FreeTypeFont,
-                            default_color: Tuple[int, int, int, int] = (255, 255, 255, 255)):
-    x, y = position
-    parts = re.split(r'(<font color=\".*?\">)', text)
-    current_color = default_color
-    for part in parts:
-        if part.startswith('<font color=\"'):
-            html_color_name_match = re.search(r'\"(.+?)\"', part)
-            if html_color_name_match:
-                html_color_name = html_color_name_match.group(1)
-                if html_color_name:
-                    current_color = HTML_COLOR_CODES.get(html_color_name, default_color)
-                    if current_color == default_color and html_color_name not in HTML_COLOR_CODES:
-                        try:
-                            current_color = ImageColor.getrgb(html_color_name)
-                        except ValueError:
-                            current_color = default_color
-                else:
-                    current_color = default_color
-            else:
-                current_color = default_color
-        else:
-            clean_text = re.sub(r'<.*?>', '', part)
-            if clean_text:
-                draw_colored_title(draw, clean_text, (x, y), font, current_color)
-                size = draw.textlength(clean_text, font=font)
-                x += size
+def _resolve_html_color(color_name: str, default_color: Color) -> Color:
+    """将 <font color="..."> 中的颜色名（或 #RRGGBB 等写法）解析为颜色。"""
+    if not color_name:
+        return default_color
+    color = HTML_COLOR_CODES.get(color_name)
+    if color is None:
+        try:
+            color = ImageColor.getrgb(color_name)
+        except ValueError:
+            color = default_color
+    return color
+
+
+def _find_tag_end(text: str, start: int) -> int:
+    """返回从 start 处的 '<' 开始的标签结束位置（不含），不构成标签时返回 0。"""
+    tag_end = text.find('>', start)
+    if tag_end == -1 or text.find('<', start + 1, tag_end) != -1:
+        return 0
+    return tag_end + 1
 
 
-def calculate_clean_length(text: str, font: ImageFont.FreeTypeFont, is_html: bool) -> int:
+@lru_cache(maxsize=MOTD_RUN_CACHE_SIZE)
+def parse_motd_runs(text: str,
+                    font: Union[ImageFont.FreeTypeFont, ImageFont.ImageFont],
+                    is_html: bool,
+                    default_color: Color = PRIMARY_TEXT_COLOR) -> Tuple[TextRun, ...]:
     """
-    计算包含颜色/格式码的字符串，在画布上渲染的实际像素长度。
+    将包含颜色/格式码的字符串一次性解析为颜色段列表，并预先测量每段的宽度。
 
     Args:
         text (str): 包含颜色码（§或<font>）的字符串。
         font (ImageFont.FreeTypeFont): 绘制使用的字体。
-        is_html (bool): True 表示使用 HTML/font 标签解析，False 表示使用 Minecraft § 码解析。
+        is_html (bool): True 表示额外解析 HTML/font 标签（其中的文本仍可包含 § 码），
+                        False 表示只解析 Minecraft § 码。
+        default_color: 没有任何颜色码时使用的颜色。
+
+    Returns:
+        由 (文本, 颜色, 宽度) 组成的元组，相邻的同色文本会被合并为一段。
+        结果按参数缓存，同一个 MOTD 在测量、截断和绘制时只会被解析一次。
     """
-    total_length = 0
-
-    if is_html:
-        # --- HTML 长度计算逻辑 ---
-        # 模拟 draw_colored_title_html：先剥离 HTML 标签
-        parts = re.split(r'(<font color=\".*?\">)', text)
-        for part in parts:
-            if part.startswith('<font color=\"'):
-                continue  # 跳过颜色标签
-            clean_text = re.sub(r'<.*?>', '', part)
-            if clean_text:
-                # HTML 模式下，clean_text 仍然可能包含 § 码
-                # 所以我们递归调用 Minecraft 长度计算来处理这部分
-                total_length += _calculate_minecraft_length(clean_text, font)
-    else:
-        # --- Minecraft § 长度计算逻辑 (无 HTML) ---
-        # 这一逻辑与 draw_colored_title 对应
-        total_length = _calculate_minecraft_length(text, font)
-
-    return int(total_length)
-
-
-def _calculate_minecraft_length(text_with_mc_codes: str, font: ImageFont.FreeTypeFont) -> int:
-    """ 内部函数：计算只包含 Minecraft § 码的字符串长度。 """
-    length = 0
-    buffer_text = ''
+    segments = []  # [文本, 颜色]
+    buffer = []
+    current_color = default_color
+
+    def _flush():
+        if not buffer:
+            return
+        chunk = ''.join(buffer)
+        buffer.clear()
+        if segments and segments[-1][1] == current_color:
+            segments[-1][0] += chunk
+        else:
+            segments.append([chunk, current_color])
+
     i = 0
-    while i < len(text_with_mc_codes):
-        if text_with_mc_codes[i] == '§':
-            if buffer_text:
-                length += font.getlength(buffer_text)
-                buffer_text = ''
-            i += 2  # 跳过 § 和后面的颜色字符/格式码
+    length = len(text)
+    while i < length:
+        char = text[i]
+        tag_end = _find_tag_end(text, i) if is_html and char == '<' else 0
+        if char == '§':
+            # § 后面紧跟一个颜色/格式码；格式码 (k-o) 不影响颜色，直接跳过
+            if i + 1 < length:
+                code = text[i + 1].lower()
+                if code in MINECRAFT_COLOR_CODES:
+                    _flush()
+                    current_color = MINECRAFT_COLOR_CODES[code]
+            i += 2
+        elif tag_end:
+            tag = text[i:tag_end]
+            if tag.startswith(_FONT_TAG_PREFIX) and tag.endswith(_FONT_TAG_SUFFIX):
+                # 新的 <font> 标签会覆盖之前的所有颜色（包括 § 码设置的颜色）
+                _flush()
+                current_color = _resolve_html_color(tag[len(_FONT_TAG_PREFIX):-len(_FONT_TAG_SUFFIX)], default_color)
+            # 其他标签（</font>、<br> 等）直接剥离
+            i = tag_end
         else:
-            buffer_text += text_with_mc_codes[i]
+            buffer.append(char)
             i += 1
+    _flush()
+
+    return tuple((chunk, color, text_length(font, chunk)) for chunk, color in segments)
+
 
-    if buffer_text:
-        length += font.getlength(buffer_text)
+def get_runs_width(runs: Tuple[TextRun, ...]) -> float:
+    """计算一组颜色段在画布上渲染的总像素宽度。"""
+    return sum(width for _, _, width in runs)
 
-    return int(length)
+
+def draw_text_runs(draw: ImageDraw.ImageDraw,
+                   runs: Tuple[TextRun, ...],
+                   position: Tuple[float, float],
+                   font: Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]):
+    """从左到右依次绘制颜色段，position 为左侧垂直居中点。"""
+    x, y = position
+    for chunk, color, width in runs:
+        draw.text((x, y), chunk, fill=color, font=font, anchor="lm")
+        x += width
@@ -1,10 +1,23 @@
 import os
-from typing import Union
+from functools import lru_cache
+from typing import Dict, Tuple, Union
 
 from PIL import ImageFont
 
 from xducraft_bot.plugins.xducraft_mc_status.constants import FONTS_PATH
 
+# 字体名称 -> (字体文件, 字号)
+# 字体在首次使用时才会加载（CJK 字体文件较大，在导入时加载会拖慢机器人启动）
+FONT_SPECS: Dict[str, Tuple[str, int]] = {
+    "mc_small": ('Minecraft AE.ttf', 16),
+    "mc_medium": ('Minecraft AE.ttf', 20),
+    "mc_motd": ('Minecraft AE.ttf', 30),
+    "mc_title": ('Minecraft AE.ttf', 39),
+    "zh_credit": ('SourceHanSansCN-Medium.otf', 20),
+    "zh_tag": ('SourceHanSansCN-Medium.otf', 30),
+}
+
+
 # --- 字体加载 ---
 def load_font(font_name: str, size: int) -> Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]:
     font_path = os.path.join(FONTS_PATH, font_name)
@@ -23,9 +36,17 @@ def load_font(font_name: str, size: int) -> Union[ImageFont.FreeTypeFont, ImageF
         return ImageFont.load_default(size=size)
 
 
-FONT_MC_SMALL = load_font('Minecraft AE.ttf', 16)
-FONT_MC_MEDIUM = load_font('Minecraft AE.ttf', 20)
-FONT_MC_MOTD = load_font('Minecraft AE.ttf', 30)
-FONT_MC_TITLE = load_font('Minecraft AE.ttf', 39)
-FONT_ZH_CREDIT = load_font('SourceHanSansCN-Medium.otf', 20)
-FONT_ZH_TAG = load_font('SourceHanSansCN-Medium.otf', 30)
+@lru_cache(maxsize=None)
+def get_font(name: str) -> Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]:
+    """
+    按名称获取字体（名称见 FONT_SPECS），首次调用时加载并缓存。
+    同一名称总是返回同一个字体对象，因此可以安全地用作其他缓存的键。
+    """
+    font_name, size = FONT_SPECS[name]
+    return load_font(font_name, size)
+
+
+def preload_fonts():
+    """提前加载所有字体（用于渲染工作线程/进程的预热）。"""
+    for name in FONT_SPECS:
+        get_font(name)
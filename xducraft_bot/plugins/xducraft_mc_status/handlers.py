@@ -2,7 +2,7 @@ import json
 import random
 import re
 
-from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, MessageSegment, PrivateMessageEvent
+from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, Message, MessageSegment, PrivateMessageEvent
 from nonebot.exception import MatcherException
 
 
@@ -18,7 +18,12 @@ from .config_coder import compress_config, decompress_config
 from .constants import WEB_UI_BASE_URL, USAGE_USER, USAGE_ADMIN
 from .data_manager import add_server, remove_server, clear_footer, add_footer, get_footer, set_server_attribute, \
     clear_server_attribute, export_group_data, import_group_data, get_server_list, get_server_info
-from .image_renderer import render_status_image
+from .decode_image import get_memory_cache_stats, get_data_uri_cache_stats
+from .disk_cache import get_cache_stats
+from .image_renderer import render_status_image, get_row_tile_stats
+from .render_pool import get_render_stats
+from .sprite_cache import get_sprite_cache_stats
+from .text_metrics import get_text_metrics_stats
 from .status_fetcher import get_all_servers_status, get_single_server_status
 from .utils import is_admin, is_valid_server_address, is_valid_hex_color
 
@@ -216,6 +221,71 @@ async def _handle_export_json(bot: Bot, event: GroupMessageEvent, arg_list: list
     await mc_status.finish("已通过私信发送JSON配置。")
 
 
+async def _handle_stats(bot: Bot, event: GroupMessageEvent, arg_list: list):
+    from . import mc_status
+    if not await is_admin(bot, event):
+        await mc_status.finish("你没有执行该命令的权限")
+
+    stats = get_render_stats()
+    lines = [
+        "【渲染执行池】",
+        f"类型: {stats['pool_type']} ({stats['workers']} 个工作者)",
+        f"排队中: {stats['queue_length']} / 执行中: {stats['in_flight']}",
+        f"已完成: {stats['completed']} / 失败: {stats['failed']}",
+        f"任务耗时: 平均 {stats['avg_job_time'] * 1000:.1f}ms / 最近 {stats['last_job_time'] * 1000:.1f}ms"
+        f" / 最长 {stats['max_job_time'] * 1000:.1f}ms",
+        f"排队等待: 平均 {stats['avg_wait_time'] * 1000:.1f}ms / 最近 {stats['last_wait_time'] * 1000:.1f}ms",
+    ]
+
+    if stats['pool_type'] == "process":
+        lines.append("注意: 进程池模式下渲染缓存位于各工作进程中，以下只是主进程中的统计")
+
+    text_stats = get_text_metrics_stats()
+    lines += [
+        "【文本测量缓存】",
+        f"命中率: {text_stats['hit_rate']:.1%} (命中 {text_stats['hits']} / 未命中 {text_stats['misses']})",
+        f"条目数: {text_stats['entries']} / {text_stats['max_entries']}",
+    ]
+
+    for title, cache_stats in (("【图标精灵缓存】", get_sprite_cache_stats()), ("【行图块缓存】", get_row_tile_stats())):
+        lines += [
+            title,
+            f"命中率: {cache_stats['hit_rate']:.1%} (命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']})",
+            f"条目数: {cache_stats['entries']}, 占用: {cache_stats['bytes'] / 1024 / 1024:.1f}MB"
+            f" / {cache_stats['max_bytes'] / 1024 / 1024:.0f}MB, 淘汰: {cache_stats['evictions']}",
+        ]
+    await mc_status.finish("\n".join(lines))
+
+
+async def _handle_cache(bot: Bot, event: GroupMessageEvent, arg_list: list):
+    from . import mc_status
+    if not await is_admin(bot, event):
+        await mc_status.finish("你没有执行该命令的权限")
+
+    memory_stats = get_memory_cache_stats()
+    data_uri_stats = get_data_uri_cache_stats()
+    disk_stats = get_cache_stats()
+    lines = [
+        "【图片内存缓存】",
+        f"命中率: {memory_stats['hit_rate']:.1%} (命中 {memory_stats['hits']} / 未命中 {memory_stats['misses']})",
+        f"条目数: {memory_stats['entries']}, 占用: {memory_stats['bytes'] / 1024 / 1024:.1f}MB"
+        f" / {memory_stats['max_bytes'] / 1024 / 1024:.0f}MB",
+        f"淘汰: {memory_stats['evictions']} / 过期: {memory_stats['expirations']}",
+        "【Base64图标解码缓存】",
+        f"命中率: {data_uri_stats['hit_rate']:.1%} (命中 {data_uri_stats['hits']} / 未命中 {data_uri_stats['misses']})",
+        f"条目数: {data_uri_stats['entries']}, 占用: {data_uri_stats['bytes'] / 1024 / 1024:.1f}MB"
+        f" / {data_uri_stats['max_bytes'] / 1024 / 1024:.0f}MB",
+        "【图片磁盘缓存】",
+        f"命中率: {disk_stats['hit_rate']:.1%} (命中 {disk_stats['hits']} / 未命中 {disk_stats['misses']})",
+        f"条目数: {disk_stats['entries']}, 占用: {disk_stats['bytes'] / 1024 / 1024:.1f}MB"
+        f" / {disk_stats['max_bytes'] / 1024 / 1024:.0f}MB",
+        f"数据文件: {disk_stats['pack_bytes'] / 1024 / 1024:.1f}MB (压缩 {disk_stats['compactions']} 次)",
+        f"写入: {disk_stats['writes']} / 淘汰: {disk_stats['evictions']} / 过期: {disk_stats['expirations']}"
+        f" / 重新验证: {disk_stats['revalidations']}",
+    ]
+    await mc_status.finish("\n".join(lines))
+
+
 async def handle_private_import(bot: Bot, event: PrivateMessageEvent, arg_list: list):
     from . import mc_status
     user_id = event.user_id
@@ -288,6 +358,19 @@ async def _handle_help(bot: Bot, event: GroupMessageEvent, arg_list: list):
         await mc_status.finish()
 
 
+async def _send_image_pages(bot: Bot, event: GroupMessageEvent, images: list):
+    """将多页状态图片以合并转发消息发送，失败时回退为一条包含所有图片的普通消息。"""
+    from . import mc_status
+    nodes = [
+        {"type": "node", "data": {"name": "服务器状态", "uin": event.self_id, "content": MessageSegment.image(file=image)}}
+        for image in images
+    ]
+    try:
+        await bot.send_group_forward_msg(group_id=event.group_id, messages=nodes)
+    except Exception:
+        await mc_status.send(Message([MessageSegment.image(file=image) for image in images]))
+
+
 async def handle_query_all(bot: Bot, event: GroupMessageEvent,show_all_servers: bool):
     from . import mc_status
     """查询所有服务器状态"""
@@ -298,8 +381,11 @@ async def handle_query_all(bot: Bot, event: GroupMessageEvent,show_all_servers:
 
         await mc_status.send("正在查询所有服务器状态...")
         server_data_list = await get_all_servers_status(event.group_id)
-        image_path = await render_status_image(server_data_list, event.group_id, show_all_servers)
-        reply_message = MessageSegment.image(file=f"file:///{image_path}")
+        images = await render_status_image(server_data_list, event.group_id, show_all_servers)
+        if len(images) > 1:
+            await _send_image_pages(bot, event, images)
+            await mc_status.finish()
+        reply_message = MessageSegment.image(file=images[0])
     except MatcherException:
         raise
     except Exception as e:
@@ -390,8 +476,8 @@ async def handle_query_single(bot: Bot, event: GroupMessageEvent, ip: str):
         final_server_data.pop('children', None)
 
         # 5. 使用处理后的数据生成图片
-        image_path = await render_status_image([final_server_data], event.group_id, True)
-        reply_message = MessageSegment.image(file=f"file:///{image_path}")
+        images = await render_status_image([final_server_data], event.group_id, True)
+        reply_message = MessageSegment.image(file=images[0])
     except MatcherException:
         raise
     except Exception as e:
@@ -461,6 +547,8 @@ SUBCOMMAND_HANDLERS = {
     "export": _handle_edit,
     "export_json": _handle_export_json,
     "help": _handle_help,
+    "stats": _handle_stats,
+    "cache": _handle_cache,
 }
 
 
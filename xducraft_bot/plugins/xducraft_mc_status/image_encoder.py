@@ -0,0 +1,65 @@
+from io import BytesIO
+from typing import Dict, Tuple
+
+from PIL import Image
+
+from .constants import IMAGE_OUTPUT_FORMAT, PNG_COMPRESS_LEVEL, PNG_QUANTIZE_COLORS, WEBP_METHOD, WEBP_EFFORT, \
+    JPEG_QUALITY
+
+# 输出格式 -> 文件扩展名
+IMAGE_EXTENSIONS: Dict[str, str] = {
+    "png": "png",
+    "png_quantized": "png",
+    "webp_lossless": "webp",
+    "jpeg": "jpg",
+}
+
+# WebP 格式支持的最大边长
+WEBP_MAX_DIMENSION = 16383
+
+
+def _encode_png(img: Image.Image, output: BytesIO):
+    """标准 PNG（无损，保留 RGBA）。"""
+    img.save(output, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+
+def _encode_png_quantized(img: Image.Image, output: BytesIO):
+    """调色板量化后的 PNG：图片只有少量纯色和抗锯齿文字，量化后体积通常只有原来的一小部分。"""
+    quantized = img.convert("RGB").quantize(colors=PNG_QUANTIZE_COLORS, method=Image.Quantize.FASTOCTREE,
+                                            dither=Image.Dither.NONE)
+    quantized.save(output, format="PNG", optimize=True)
+
+
+def _encode_webp_lossless(img: Image.Image, output: BytesIO):
+    """无损 WebP。"""
+    img.save(output, format="WEBP", lossless=True, quality=WEBP_EFFORT, method=WEBP_METHOD)
+
+
+def _encode_jpeg(img: Image.Image, output: BytesIO):
+    """高质量 JPEG（有损，不支持透明通道）。"""
+    img.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True, subsampling=0)
+
+
+_ENCODERS = {
+    "png": _encode_png,
+    "png_quantized": _encode_png_quantized,
+    "webp_lossless": _encode_webp_lossless,
+    "jpeg": _encode_jpeg,
+}
+
+
+def encode_image(img: Image.Image, output_format: str = IMAGE_OUTPUT_FORMAT) -> Tuple[bytes, str]:
+    """
+    按指定的输出格式将图片编码为字节。
+    返回 (编码后的数据, 文件扩展名)。图片超出 WebP 尺寸上限时自动回退为 PNG。
+    """
+    encoder = _ENCODERS.get(output_format)
+    if encoder is None:
+        raise ValueError(f"不支持的图片输出格式: {output_format}，可选: {', '.join(_ENCODERS)}")
+    if output_format == "webp_lossless" and max(img.size) > WEBP_MAX_DIMENSION:
+        output_format = "png"
+        encoder = _encode_png
+
+    output = BytesIO()
+    encoder(img, output)
+    return output.getvalue(), IMAGE_EXTENSIONS[output_format]
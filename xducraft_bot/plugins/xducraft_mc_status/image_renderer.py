@@ -1,161 +1,393 @@
 # 1. 标准库导入
-import re
+import asyncio
+import hashlib
+import time
+import uuid
+from functools import lru_cache
 from math import ceil
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # 2. 第三方库导入
-from PIL import Image, ImageDraw, ImageFile
+from PIL import Image, ImageChops, ImageDraw, ImageFile
 
 # 3. 本地应用/项目特定导入
+from .bounded_cache import BoundedLRUCache
 from .constants import *
 from .data_manager import get_footer
 from .decode_image import decode_image
-from .drawing_utils import draw_colored_title_html, calculate_clean_length
-from .fonts import FONT_MC_SMALL, FONT_MC_MEDIUM, FONT_MC_MOTD, FONT_ZH_TAG, FONT_MC_TITLE, FONT_ZH_CREDIT
-from .status_fetcher import preprocess_server_data, prepare_data_for_display
+from .drawing_utils import parse_motd_runs, get_runs_width, draw_text_runs
+from .fonts import get_font
+from .image_encoder import encode_image
+from .render_pool import run_render_job
+from .sprite_cache import get_icon_key, get_icon_sprite, get_placeholder_sprite, clear_sprite_cache
+from .layout import build_layout
+from .text_metrics import text_length, text_bbox
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-if not os.path.exists(SAVE_IMG_DIR):
-    os.makedirs(SAVE_IMG_DIR)
+# 行图块缓存：键为行内可见字段与缩进层级的哈希，值为 (图块, 图块相对整行画布的偏移)
+# 图块只保留行内实际绘制的区域（裁掉四周的背景），并以不透明的 RGB 保存，每行约 250~350KB
+# 没有 Tag 时 MOTD 的垂直中心非常靠近行顶部，文字会略微超出行的上边界，因此整行画布顶部额外保留一段边距
+_ROW_TILE_TOP_MARGIN = 20
+_row_tiles = BoundedLRUCache(ROW_TILE_CACHE_MAX_BYTES, sizeof=lambda entry: entry[0].width * entry[0].height * 3)
 
 
-def _calculate_recursive_height(server_nodes: List[Dict[str, Any]]) -> int:
-    """递归地计算渲染服务器节点列表所需的总高度。"""
-    height = 0
-    for server in server_nodes:
-        height += SERVER_ROW_HEIGHT
-        if server.get('online') and server.get('players', {}).get('online') != 0 and server.get('players', {}).get('sample'):
-            height += PLAYER_LIST_OFFSET
-        if 'children' in server and server['children']:
-            height += _calculate_recursive_height(server['children'])
-    return height
-
-
-def calculate_image_height(display_data: List[Dict[str, Any]], footer_text: str) -> int:
-    """根据服务器树和页脚计算最终图片的高度。"""
-    total_height = LAYOUT_TITLE_AREA_HEIGHT
-    total_height += _calculate_recursive_height(display_data)
-    if footer_text:
-        total_height += LAYOUT_FOOTER_AREA_HEIGHT
-    total_height += LAYOUT_CREDIT_AREA_HEIGHT
-    return total_height
-
-
-async def _draw_server_row(img: Image.Image, draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], current_y: int,
-                           horizontal_offset: int):
+def _draw_server_row(img: Image.Image, draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], current_y: int,
+                     horizontal_offset: int, icons: Dict[str, bytes], icon_keys: Dict[str, str]):
     """绘制单个服务器条目（图标, MOTD, IP, 状态, 玩家列表）。"""
     info = server_data
     tag = info.get('tag')
     tag_color_hex = info.get('tag_color')
 
-    await _draw_icon(img, server_data, current_y, horizontal_offset)
+    _draw_icon(img, server_data, current_y, horizontal_offset, icons, icon_keys)
     tag_total_width, tag_center_y = _draw_tag_with_background(draw, tag, tag_color_hex, current_y, horizontal_offset)
     _draw_motd(draw, server_data, current_y, horizontal_offset, tag_total_width, tag_center_y)
     _draw_hostname(draw, server_data, current_y, horizontal_offset)
     _draw_status_info(draw, server_data, current_y)
 
 
-async def _recursive_draw_servers(
-    img: Image.Image,
-    draw: ImageDraw.ImageDraw,
-    nodes: List[Dict[str, Any]],
-    y_cursor: int,
-    level: int = 0,
-    parent_had_players: bool = False
-) -> int:
+def _row_tile_key(server_data: Dict[str, Any], level: int, icon_keys: Dict[str, str]) -> str:
+    """根据一行中所有可见的字段与缩进层级计算行图块的缓存键。"""
+    players = server_data.get('players') or {}
+    visible_fields = (
+        level,
+        icon_keys.get(server_data.get('favicon') or ""),
+        server_data.get('ip'),
+        server_data.get('tag'),
+        server_data.get('tag_color'),
+        server_data.get('online'),
+        server_data.get('comment'),
+        server_data.get('hide_ip'),
+        server_data.get('display_name'),
+        server_data.get('description'),
+        server_data.get('ping'),
+        server_data.get('version'),
+        players.get('online'),
+        players.get('max'),
+        [p.get('name') for p in players.get('sample') or []],
+    )
+    return hashlib.sha1(repr(visible_fields).encode('utf-8')).hexdigest()
+
+
+def _render_row_tile(row: Dict[str, Any], icons: Dict[str, bytes],
+                     icon_keys: Dict[str, str]) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    将一行服务器信息渲染到独立的整行画布（背景为主内容区背景色），再裁剪为实际绘制内容的区域。
+    返回 (RGB 图块, 图块在整行画布中的偏移)；整行画布顶部包含 _ROW_TILE_TOP_MARGIN 的边距，粘贴时需要相应上移。
     """
-    递归地绘制服务器树。
-    返回绘制完成后的新y坐标。
+    canvas = Image.new('RGBA', (IMAGE_WIDTH, _ROW_TILE_TOP_MARGIN + row["height"]), color=MAIN_CONTENT_BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(canvas)
+    _draw_server_row(canvas, draw, row["server"], _ROW_TILE_TOP_MARGIN, row["level"] * CHILD_INDENT_PX,
+                     icons, icon_keys)
+    # 背景不透明，转为 RGB 不丢失信息；与纯背景比较得到绘制内容的包围盒
+    canvas = canvas.convert('RGB')
+    background = Image.new('RGB', canvas.size, color=MAIN_CONTENT_BACKGROUND_COLOR[:3])
+    bbox = ImageChops.difference(canvas, background).getbbox() or (0, 0, 1, 1)
+    return canvas.crop(bbox), (bbox[0], bbox[1])
+
+
+def _draw_server_rows(img: Image.Image, draw: ImageDraw.ImageDraw, rows: List[Dict[str, Any]],
+                      icons: Dict[str, bytes], x_offset: int = 0, y_offset: int = 0):
     """
-    for i, server_data in enumerate(nodes):
-        is_first_child = (i == 0)
-        is_last_child = (i == len(nodes) - 1)
-        horizontal_offset = level * CHILD_INDENT_PX
+    绘制所有服务器行：内容未变化的行直接粘贴缓存的图块，只重新渲染有变化的行。
+    图块按从上到下的顺序粘贴，顶部边距只会覆盖上一行底部的空白区域。
+    最后统一绘制连接线（连接线会穿过父服务器所在行的图块，因此必须在图块之后绘制）。
+    x_offset/y_offset 为这一列在画布上的位置。
+    """
+    icon_keys = {src: get_icon_key(icon_bytes) for src, icon_bytes in icons.items()}
 
-        if level > 0:
-            _draw_connector_line(draw, y_cursor, is_first_child, is_last_child, level, parent_had_players)
+    for row in rows:
+        key = _row_tile_key(row["server"], row["level"], icon_keys)
+        entry = _row_tiles.get(key)
+        if entry is None:
+            entry = _render_row_tile(row, icons, icon_keys)
+            _row_tiles.put(key, entry)
+        tile, (dx, dy) = entry
+        img.paste(tile, (x_offset + dx, y_offset + row["y"] - _ROW_TILE_TOP_MARGIN + dy))
 
-        await _draw_server_row(img, draw, server_data, y_cursor, horizontal_offset)
+    for row in rows:
+        row_y = y_offset + row["y"]
+        for x0, y0, x1, y1 in row["connectors"]:
+            draw.line(xy=(x_offset + x0, row_y + y0, x_offset + x1, row_y + y1), fill=CONNECTOR_LINE_COLOR,
+                      width=CONNECTOR_LINE_THICKNESS)
 
-        current_server_has_players = bool(
-            server_data.get('online') and 
-            server_data.get('players', {}).get('online') != 0 and 
-            server_data.get('players', {}).get('sample')
-        )
 
-        y_cursor += SERVER_ROW_HEIGHT
-        if current_server_has_players:
-            y_cursor += PLAYER_LIST_OFFSET
+def get_row_tile_stats() -> Dict[str, Any]:
+    """获取行图块缓存的统计信息。"""
+    return _row_tiles.stats()
 
-        if 'children' in server_data and server_data['children']:
-            y_cursor = await _recursive_draw_servers(
-                img, draw, server_data['children'], y_cursor, level + 1, parent_had_players=current_server_has_players
-            )
 
-    return y_cursor
+def clear_render_caches():
+    """清空渲染相关的所有内存缓存（行图块、标题栏/页脚图层、图标精灵、文字测量与 MOTD 解析结果）。"""
+    _row_tiles.clear()
+    _get_header_layer.cache_clear()
+    _get_bottom_layer.cache_clear()
+    clear_sprite_cache()
+    text_length.cache_clear()
+    text_bbox.cache_clear()
+    parse_motd_runs.cache_clear()
 
 
-async def render_status_image(server_data_list: List[Dict[str, Any]], group_id: int, show_all_servers: bool) -> str:
-    """从树形结构渲染Minecraft服务器状态图片。"""
-    clean_data = preprocess_server_data(server_data_list)
-    display_data = prepare_data_for_display(clean_data, show_all_servers)
-    footer_text = get_footer(group_id)
+async def _prefetch_icons(rows: List[Dict[str, Any]]) -> Dict[str, bytes]:
+    """
+    并发地下载/解码所有行中的图标（相同的 favicon 源只获取一次）。
+    返回以 favicon 源为键、图片字节为值的映射，获取失败的图标不会出现在映射中。
+    """
+    sources = dict.fromkeys(row["server"]["favicon"] for row in rows if row["server"].get("favicon"))
+    if not sources:
+        return {}
 
-    image_height = calculate_image_height(display_data, footer_text)
+    semaphore = asyncio.Semaphore(ICON_PREFETCH_CONCURRENCY)
 
-    img = Image.new('RGBA', (IMAGE_WIDTH, image_height), color=CANVAS_BACKGROUND_COLOR)
-    draw = ImageDraw.Draw(img)
+    async def _fetch(src: str):
+        async with semaphore:
+            return await decode_image(src)
 
-    _draw_header_and_background(draw, image_height, bool(footer_text))
+    results = await asyncio.gather(*(_fetch(src) for src in sources), return_exceptions=True)
+
+    icons: Dict[str, bytes] = {}
+    for src, result in zip(sources, results):
+        if isinstance(result, Exception):
+            print(f"获取服务器图标失败: {result}")
+        elif result:
+            icons[src] = result.getvalue()
+    return icons
+
+
+def _page_chrome_height(footer_text: str) -> int:
+    """每页中除服务器列表以外的固定高度（标题、页脚、鸣谢）。"""
+    height = LAYOUT_TITLE_AREA_HEIGHT + LAYOUT_CREDIT_AREA_HEIGHT
+    if footer_text:
+        height += LAYOUT_FOOTER_AREA_HEIGHT
+    return height
+
+
+def _rows_height(rows: List[Dict[str, Any]]) -> int:
+    return sum(row["height"] for row in rows)
+
+
+def _split_into_blocks(rows: List[Dict[str, Any]], limit: int) -> List[List[Dict[str, Any]]]:
+    """
+    按根服务器将行划分为子树块，分页只在子树块之间进行。
+    单个子树超过 limit 时才会在其内部的行边界处继续拆分（被拆开的连接线会在页顶被裁切）。
+    """
+    subtrees: List[List[Dict[str, Any]]] = []
+    for row in rows:
+        if row["level"] == 0 or not subtrees:
+            subtrees.append([])
+        subtrees[-1].append(row)
+
+    blocks = []
+    for subtree in subtrees:
+        chunk, chunk_height = [], 0
+        for row in subtree:
+            if chunk and chunk_height + row["height"] > limit:
+                blocks.append(chunk)
+                chunk, chunk_height = [], 0
+            chunk.append(row)
+            chunk_height += row["height"]
+        blocks.append(chunk)
+    return blocks
+
+
+def _pack_columns(blocks: List[List[Dict[str, Any]]], limit: int) -> List[List[Dict[str, Any]]]:
+    """按顺序将子树块贪心地装入列，每列高度不超过 limit。"""
+    columns, current, current_height = [], [], 0
+    for block in blocks:
+        block_height = _rows_height(block)
+        if current and current_height + block_height > limit:
+            columns.append(current)
+            current, current_height = [], 0
+        current.extend(block)
+        current_height += block_height
+    if current:
+        columns.append(current)
+    return columns
+
+
+def paginate_rows(rows: List[Dict[str, Any]], footer_text: str) -> List[List[List[Dict[str, Any]]]]:
+    """
+    将服务器行分页，返回 页 -> 列 -> 行 的三层列表，行的y坐标会被重新定位到所在列的顶部。
+    每页高度不超过 MAX_PAGE_HEIGHT；LAYOUT_COLUMNS > 1 时每页并排放置多列，并尽量使各列高度均衡。
+    """
+    limit = max(MAX_PAGE_HEIGHT - _page_chrome_height(footer_text), SERVER_ROW_HEIGHT + PLAYER_LIST_OFFSET)
+    blocks = _split_into_blocks(rows, limit) if rows else []
+    columns = _pack_columns(blocks, limit)
+
+    if LAYOUT_COLUMNS > 1 and len(blocks) > 1:
+        # 在不增加页数的前提下，寻找能让各列高度最均衡的列高
+        slots = ceil(len(columns) / LAYOUT_COLUMNS) * LAYOUT_COLUMNS
+        target = max(ceil(_rows_height(rows) / slots), max(_rows_height(block) for block in blocks))
+        while target < limit:
+            balanced = _pack_columns(blocks, target)
+            if len(balanced) <= slots:
+                columns = balanced
+                break
+            target += PLAYER_LIST_OFFSET
+
+    positioned_columns = []
+    for column in columns:
+        y_cursor = 0
+        positioned = []
+        for row in column:
+            positioned.append({**row, "y": y_cursor})
+            y_cursor += row["height"]
+        positioned_columns.append(positioned)
+
+    if not positioned_columns:
+        return [[[]]]
+    return [positioned_columns[i:i + LAYOUT_COLUMNS] for i in range(0, len(positioned_columns), LAYOUT_COLUMNS)]
+
+
+async def _prepare_render_jobs(server_data_list: List[Dict[str, Any]], group_id: int,
+                               show_all_servers: bool) -> List[Dict[str, Any]]:
+    """
+    渲染的异步准备阶段：计算布局、读取页脚、获取所有图标并分页。
+    每一页对应一个渲染任务，任务字典只包含纯数据，可以被 pickle 后交给工作进程。
+    """
+    rows = build_layout(server_data_list, show_all_servers)
+    footer_text = get_footer(group_id)
+    icons = await _prefetch_icons(rows)
+    return build_page_jobs(rows, footer_text, icons)
+
+
+def build_page_jobs(rows: List[Dict[str, Any]], footer_text: str, icons: Dict[str, bytes]) -> List[Dict[str, Any]]:
+    """将服务器行分页，并为每一页生成独立的渲染任务（只携带该页用到的图标）。"""
+    pages = paginate_rows(rows, footer_text)
+    jobs = []
+    for index, columns in enumerate(pages):
+        page_sources = {row["server"].get("favicon") for column in columns for row in column}
+        jobs.append({
+            "title": "Minecraft服务器状态" + (f" ({index + 1}/{len(pages)})" if len(pages) > 1 else ""),
+            "columns": columns,
+            "footer_text": footer_text,
+            "icons": {src: data for src, data in icons.items() if src in page_sources},
+        })
+    return jobs
+
+
+def paint_status_image(job: Dict[str, Any]) -> Image.Image:
+    """根据渲染任务绘制一页完整的状态图片（不编码）。"""
+    columns = job["columns"]
+    footer_text = job["footer_text"]
+
+    list_height = max(_rows_height(column) for column in columns)
+    img = Image.new('RGBA', (IMAGE_WIDTH * len(columns), _page_chrome_height(footer_text) + list_height),
+                    color=MAIN_CONTENT_BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(img)
 
     list_start_y = LAYOUT_TITLE_AREA_HEIGHT + OFFSET_SERVER_LIST_START_Y
-    await _recursive_draw_servers(img, draw, display_data, list_start_y)
+    for column_index, column in enumerate(columns):
+        _draw_server_rows(img, draw, column, job["icons"], IMAGE_WIDTH * column_index, list_start_y)
 
-    _draw_footer_and_credit(draw, image_height, footer_text)
+    _paste_chrome_layers(img, job["title"], footer_text)
+    return img
 
-    img_path = os.path.join(SAVE_IMG_DIR, f"mc_status_{group_id}.png")
-    img.save(img_path)
-    return img_path
+
+def draw_status_image(job: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    渲染任务本体：纯同步地绘制一页图片并按配置的格式编码，返回 (图片数据, 文件扩展名)。
+    该函数不访问网络和事件循环，在渲染执行池中运行。
+    """
+    return encode_image(paint_status_image(job))
+
+
+async def render_status_image(server_data_list: List[Dict[str, Any]], group_id: int,
+                              show_all_servers: bool) -> List[bytes]:
+    """
+    从树形结构渲染Minecraft服务器状态图片，返回每一页编码后的图片数据（各页并行渲染）。
+    开启 SAVE_IMAGE_TO_DISK 时，会额外将图片以唯一文件名保存到 SAVE_IMG_DIR（用于排查）。
+    """
+    jobs = await _prepare_render_jobs(server_data_list, group_id, show_all_servers)
+    results = await asyncio.gather(*(run_render_job(draw_status_image, job) for job in jobs))
+
+    if SAVE_IMAGE_TO_DISK:
+        for image_data, extension in results:
+            await asyncio.to_thread(_save_image_file, image_data, group_id, extension)
+    return [image_data for image_data, _ in results]
+
+
+def _save_image_file(image_data: bytes, group_id: int, extension: str):
+    """以唯一文件名保存图片，并只保留最近的 SAVED_IMAGE_MAX_FILES 张。"""
+    try:
+        os.makedirs(SAVE_IMG_DIR, exist_ok=True)
+        file_name = f"mc_status_{group_id}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}.{extension}"
+        with open(os.path.join(SAVE_IMG_DIR, file_name), "wb") as f:
+            f.write(image_data)
+
+        saved_files = sorted(
+            (entry for entry in os.scandir(SAVE_IMG_DIR) if entry.name.startswith("mc_status_")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in saved_files[SAVED_IMAGE_MAX_FILES:]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"保存状态图片失败: {e}")
 
 
 # --- 绘图辅助函数 ---
 
-def _draw_header_and_background(draw: ImageDraw.ImageDraw, image_height: int, footer_exists: bool):
-    """绘制背景矩形和主标题。"""
-    content_end_y = image_height - LAYOUT_CREDIT_AREA_HEIGHT
-    if footer_exists:
-        content_end_y -= LAYOUT_FOOTER_AREA_HEIGHT
+@lru_cache(maxsize=CHROME_FOOTER_CACHE_SIZE)
+def _get_header_layer(title: str, width: int) -> Image.Image:
+    """预渲染顶部标题栏图层，按标题（含页码）与宽度缓存。"""
+    layer = Image.new('RGBA', (width, LAYOUT_TITLE_AREA_HEIGHT), color=CANVAS_BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(layer)
+    draw.text(xy=(width / 2, LAYOUT_TITLE_AREA_HEIGHT / 2), text=title,
+              fill=PRIMARY_TEXT_COLOR, font=get_font("mc_title"), anchor='mm')
+    return layer
+
 
-    draw.rectangle(xy=(0, LAYOUT_TITLE_AREA_HEIGHT, IMAGE_WIDTH, content_end_y), fill=MAIN_CONTENT_BACKGROUND_COLOR)
-    draw.text(xy=(IMAGE_WIDTH / 2, LAYOUT_TITLE_AREA_HEIGHT / 2), text="Minecraft服务器状态",
-              fill=PRIMARY_TEXT_COLOR, font=FONT_MC_TITLE, anchor='mm')
+@lru_cache(maxsize=CHROME_FOOTER_CACHE_SIZE)
+def _get_bottom_layer(footer_text: str, width: int) -> Image.Image:
+    """
+    预渲染底部图层（页脚 + 鸣谢），按页脚文本与宽度缓存。
+    图层第一行属于主内容区背景，与整体绘制时的矩形边界保持一致。
+    """
+    band_height = LAYOUT_CREDIT_AREA_HEIGHT
+    if footer_text:
+        band_height += LAYOUT_FOOTER_AREA_HEIGHT
 
+    layer = Image.new('RGBA', (width, band_height), color=CANVAS_BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(layer)
+    draw.rectangle(xy=(0, 0, width, 0), fill=MAIN_CONTENT_BACKGROUND_COLOR)
 
-def _draw_footer_and_credit(draw: ImageDraw.ImageDraw, image_height: int, footer_text: str):
-    """在底部绘制页脚和鸣谢文本。"""
     if footer_text:
-        footer_y = image_height - LAYOUT_CREDIT_AREA_HEIGHT - (LAYOUT_FOOTER_AREA_HEIGHT / 2)
+        footer_y = band_height - LAYOUT_CREDIT_AREA_HEIGHT - (LAYOUT_FOOTER_AREA_HEIGHT / 2)
         draw.text((LAYOUT_BASE_PADDING, footer_y), text=footer_text, anchor="lm",
-                  fill=PRIMARY_TEXT_COLOR, font=FONT_MC_MEDIUM)
+                  fill=PRIMARY_TEXT_COLOR, font=get_font("mc_medium"))
 
-    credit_y = image_height - (LAYOUT_CREDIT_AREA_HEIGHT / 2)
-    draw.text((IMAGE_WIDTH / 2, credit_y), "Powered by FlyingPig278, LITTLE-UNIkeEN",
-              fill=CREDIT_TEXT_COLOR, font=FONT_ZH_CREDIT, anchor="mm")
+    credit_y = band_height - (LAYOUT_CREDIT_AREA_HEIGHT / 2)
+    draw.text((width / 2, credit_y), "Powered by FlyingPig278, LITTLE-UNIkeEN",
+              fill=CREDIT_TEXT_COLOR, font=get_font("zh_credit"), anchor="mm")
+    return layer
 
 
-async def _draw_icon(img: Image.Image, server_data: Dict[str, Any], current_y: int, horizontal_offset: int):
-    """绘制服务器的favicon。"""
-    icon_url = server_data.get("favicon")
-    if icon_url:
-        icon_bytes = await decode_image(icon_url)
-        if icon_bytes:
-            try:
-                with Image.open(icon_bytes) as img_avatar:
-                    img_avatar = img_avatar.resize((LAYOUT_SERVER_ICON_SIZE, LAYOUT_SERVER_ICON_SIZE)).convert("RGBA")
-                    img.paste(img_avatar, (horizontal_offset + LAYOUT_BASE_PADDING, current_y), img_avatar)
-            except Exception as e:
-                print(f"粘贴服务器图标失败 {server_data.get('ip')}: {e}")
+def _paste_chrome_layers(img: Image.Image, title: str, footer_text: str):
+    """
+    在画布顶部和底部粘贴缓存的标题栏、页脚与鸣谢图层。
+    需要在服务器行之后粘贴：最后一行图块底部的空白区域会延伸到鸣谢区域内，
+    而分页时从上一页延续下来的连接线会延伸到标题栏内。
+    """
+    img.paste(_get_header_layer(title, img.width), (0, 0))
+    bottom = _get_bottom_layer(footer_text, img.width)
+    img.paste(bottom, (0, img.height - bottom.height))
+
+
+def _draw_icon(img: Image.Image, server_data: Dict[str, Any], current_y: int, horizontal_offset: int,
+               icons: Dict[str, bytes], icon_keys: Dict[str, str]):
+    """绘制服务器的favicon（图标数据已在准备阶段获取），没有图标时绘制占位图标。"""
+    sprite = None
+    icon_url = server_data.get("favicon") or ""
+    icon_bytes = icons.get(icon_url)
+    if icon_bytes:
+        try:
+            sprite = get_icon_sprite(icon_bytes, icon_keys.get(icon_url))
+        except Exception as e:
+            print(f"解码服务器图标失败 {server_data.get('ip')}: {e}")
+    if sprite is None:
+        sprite = get_placeholder_sprite()
+    img.paste(sprite, (horizontal_offset + LAYOUT_BASE_PADDING, current_y), sprite)
 
 
 def _draw_tag_with_background(draw: ImageDraw.ImageDraw, tag: str, tag_color_hex: str, current_y: int,
@@ -167,7 +399,7 @@ def _draw_tag_with_background(draw: ImageDraw.ImageDraw, tag: str, tag_color_hex
     fill_color = f"#{tag_color_hex}" if tag_color_hex else TAG_DEFAULT_BACKGROUND
     tag_text = tag
 
-    bbox = draw.textbbox((0, 0), tag_text, font=FONT_ZH_TAG)
+    bbox = text_bbox(get_font("zh_tag"), tag_text)
     tag_text_height = int(ceil(bbox[3] - bbox[1]))
     tag_text_width = int(ceil(bbox[2] - bbox[0]))
 
@@ -185,7 +417,7 @@ def _draw_tag_with_background(draw: ImageDraw.ImageDraw, tag: str, tag_color_hex
 
     draw.rounded_rectangle(xy=(x0, y0, x1, y1), fill=fill_color, radius=3)
     draw.text(xy=(center_x, center_y), text=tag_text,
-              fill=TAG_TEXT_COLOR, font=FONT_ZH_TAG, anchor='mm')
+              fill=TAG_TEXT_COLOR, font=get_font("zh_tag"), anchor='mm')
 
     return rect_width + ICON_TEXT_SPACING, center_y
 
@@ -200,7 +432,8 @@ def _draw_motd(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], current_y
     if not server_data.get('online'):
         comment = server_data.get('comment')
         offline_text = comment if comment else "服务器离线"
-        draw.text((motd_start_x, motd_center_y), offline_text, fill=SECONDARY_TEXT_COLOR, font=FONT_MC_MOTD, anchor="lm")
+        draw.text((motd_start_x, motd_center_y), offline_text, fill=SECONDARY_TEXT_COLOR, font=get_font("mc_motd"),
+                  anchor="lm")
         return
 
     # --- 在线服务器逻辑 ---
@@ -210,30 +443,21 @@ def _draw_motd(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], current_y
     if isinstance(description_data, dict):
         title = description_data.get('html') or description_data.get('text', 'Unknown Server Name')
         title = title.replace('服务器已离线...', '')
-        check_title = title.replace('<br>', ' | ')
         is_html_mode = 'html' in description_data
 
-        # 简单的截断逻辑 (如果需要可以改进)
+        # 简单的截断逻辑：整段放不下时只显示第一行
         max_len_px = IMAGE_WIDTH - motd_start_x - 100  # 为ping/players保留空间
         if title == 'A Minecraft Server' and server_data.get('comment'):
-            final_title = server_data.get('comment')
-        elif calculate_clean_length(check_title, FONT_MC_MOTD, is_html=is_html_mode) > max_len_px:
-            final_title = title.split('<br>', 1)[0]
+            runs = parse_motd_runs(server_data.get('comment'), get_font("mc_motd"), is_html_mode)
         else:
-            final_title = check_title
+            runs = parse_motd_runs(title.replace('<br>', ' | '), get_font("mc_motd"), is_html_mode)
+            if get_runs_width(runs) > max_len_px:
+                runs = parse_motd_runs(title.split('<br>', 1)[0], get_font("mc_motd"), is_html_mode)
 
-        if is_html_mode:
-            draw_colored_title_html(draw, final_title, (motd_start_x, motd_center_y), font=FONT_MC_MOTD)
-        else:
-            final_title = re.sub(r'§[klmno]', '', final_title)
-            try:
-                from .drawing_utils import draw_colored_title
-                draw_colored_title(draw, final_title, (motd_start_x, motd_center_y), font=FONT_MC_MOTD)
-            except ImportError:
-                draw.text((motd_start_x, motd_center_y), final_title, fill=PRIMARY_TEXT_COLOR, font=FONT_MC_MOTD, anchor="lm")
+        draw_text_runs(draw, runs, (motd_start_x, motd_center_y), get_font("mc_motd"))
 
     else:
-        draw.text((motd_start_x, current_y), motd_text, fill=SECONDARY_TEXT_COLOR, font=FONT_MC_MOTD)
+        draw.text((motd_start_x, current_y), motd_text, fill=SECONDARY_TEXT_COLOR, font=get_font("mc_motd"))
 
 
 def _draw_hostname(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], current_y: int, horizontal_offset: int):
@@ -248,7 +472,7 @@ def _draw_hostname(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], curre
         hostname_text = server_data.get('ip', '未知服务器').replace("."," . ").replace(":"," : ")
 
     draw.text((horizontal_offset + LAYOUT_BASE_PADDING + LAYOUT_SERVER_ICON_SIZE + ICON_TEXT_SPACING, current_y + OFFSET_IP_Y),
-              hostname_text, fill=SECONDARY_TEXT_COLOR, font=FONT_MC_MEDIUM)
+              hostname_text, fill=SECONDARY_TEXT_COLOR, font=get_font("mc_medium"))
 
 
 def _draw_status_info(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], current_y: int):
@@ -257,11 +481,12 @@ def _draw_status_info(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], cu
         ping = int(server_data.get('ping', 0))
         ping_color = PING_COLOR_RED if ping >= 100 else PING_COLOR_GREEN
         ping_text = f"{ping}ms"
-        draw.text((IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y), ping_text, fill=ping_color, anchor='ra', font=FONT_MC_MEDIUM)
+        draw.text((IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y), ping_text, fill=ping_color, anchor='ra',
+                  font=get_font("mc_medium"))
 
         players_text = f"{server_data.get('players', {}).get('online', 'N/A')}/{server_data.get('players', {}).get('max', 'N/A')}"
         draw.text((IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y + OFFSET_PLAYER_COUNT_Y), players_text,
-                  fill=SECONDARY_TEXT_COLOR, anchor='ra', font=FONT_MC_MEDIUM)
+                  fill=SECONDARY_TEXT_COLOR, anchor='ra', font=get_font("mc_medium"))
 
         version_info = server_data.get('version')
         if isinstance(version_info, dict):
@@ -271,48 +496,23 @@ def _draw_status_info(draw: ImageDraw.ImageDraw, server_data: Dict[str, Any], cu
         else:
             version_text = 'N/A'
         draw.text((IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y + OFFSET_VERSION_Y), version_text,
-                  fill=SECONDARY_TEXT_COLOR, anchor='ra', font=FONT_MC_MEDIUM)
+                  fill=SECONDARY_TEXT_COLOR, anchor='ra', font=get_font("mc_medium"))
 
         player_sample = server_data.get('players', {}).get('sample')
         if server_data.get('players', {}).get('online') != 0 and player_sample:
+            font_small = get_font("mc_small")
             player_names = ", ".join([p['name'] for p in player_sample])
-            if draw.textlength(player_names, font=FONT_MC_SMALL) > IMAGE_WIDTH / 2:
+            if text_length(font_small, player_names) > IMAGE_WIDTH / 2:
                 player_names = player_names[:40] + "..."
             player_text = f"{player_names} 正在游玩"
 
             draw.text(xy=(IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y + OFFSET_PLAYER_LIST_Y),
-                      text='●', fill=PING_COLOR_GREEN, anchor='ra', font=FONT_MC_SMALL)
-            draw.text(xy=(IMAGE_WIDTH - LAYOUT_BASE_PADDING - draw.textlength('●', font=FONT_MC_SMALL) - PLAYER_LIST_DOT_SPACING,
+                      text='●', fill=PING_COLOR_GREEN, anchor='ra', font=font_small)
+            draw.text(xy=(IMAGE_WIDTH - LAYOUT_BASE_PADDING - text_length(font_small, '●') - PLAYER_LIST_DOT_SPACING,
                           current_y + OFFSET_PLAYER_LIST_Y),
-                      text=player_text, fill=SECONDARY_TEXT_COLOR, anchor='ra', font=FONT_MC_SMALL)
+                      text=player_text, fill=SECONDARY_TEXT_COLOR, anchor='ra', font=font_small)
     else:
         draw.text((IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y), "offline",
-                  fill=PING_COLOR_RED, anchor='ra', font=FONT_MC_MEDIUM)
+                  fill=PING_COLOR_RED, anchor='ra', font=get_font("mc_medium"))
         draw.text((IMAGE_WIDTH - LAYOUT_BASE_PADDING, current_y + OFFSET_PLAYER_COUNT_Y), "服务器离线",
-                  fill=SECONDARY_TEXT_COLOR, anchor='ra', font=FONT_MC_MEDIUM)
-
-
-def _draw_connector_line(draw: ImageDraw.ImageDraw, current_y: int, is_first_child: bool, is_last_child: bool, level: int, parent_had_players: bool):
-    """为子服务器绘制L形的连接线。"""
-    main_trunk_x = LAYOUT_BASE_PADDING + (level - 1) * CHILD_INDENT_PX + (LAYOUT_SERVER_ICON_SIZE / 2)
-    branch_x_end = LAYOUT_BASE_PADDING + level * CHILD_INDENT_PX
-    line_y = current_y + (LAYOUT_SERVER_ICON_SIZE / 2)
-
-    # 绘制水平分支
-    draw.line(xy=(main_trunk_x, line_y, branch_x_end, line_y), fill=CONNECTOR_LINE_COLOR, width=CONNECTOR_LINE_THICKNESS)
-
-    # 计算垂直线的起始Y坐标
-    if is_first_child:
-        start_y = current_y - SERVER_ROW_HEIGHT
-        if parent_had_players:
-            start_y -= PLAYER_LIST_OFFSET
-        start_y += LAYOUT_SERVER_ICON_SIZE # 从父图标的顶部开始
-    else:
-        start_y = current_y # 从当前行的顶部开始
-
-    # 计算垂直线的结束Y坐标
-    end_y = line_y if is_last_child else (current_y + SERVER_ROW_HEIGHT + PLAYER_LIST_OFFSET)
-
-    # 绘制垂直主干
-    if end_y > start_y:
-        draw.line(xy=(main_trunk_x, start_y, main_trunk_x, end_y), fill=CONNECTOR_LINE_COLOR, width=CONNECTOR_LINE_THICKNESS)
\ No newline at end of file
+                  fill=SECONDARY_TEXT_COLOR, anchor='ra', font=get_font("mc_medium"))
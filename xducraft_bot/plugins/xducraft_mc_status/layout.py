@@ -0,0 +1,122 @@
+from typing import Any, Dict, List, Tuple
+
+from .constants import (DEFAULT_SERVER_PRIORITY, SERVER_ROW_HEIGHT, PLAYER_LIST_OFFSET, CHILD_INDENT_PX,
+                        LAYOUT_BASE_PADDING, LAYOUT_SERVER_ICON_SIZE)
+
+# 匿名玩家的 UUID，不显示在玩家列表中
+ANONYMOUS_PLAYER_ID = '00000000-0000-0000-0000-000000000000'
+
+# 连接线线段：(x0, y0, x1, y1)，坐标相对于所在行的左上角
+Segment = Tuple[float, float, float, float]
+
+
+def _row_server(node: Dict[str, Any]) -> Dict[str, Any]:
+    """复制服务器自身的字段（不含子树），并从玩家列表中去掉匿名玩家。不修改原始数据。"""
+    server = {k: v for k, v in node.items() if k != 'children'}
+    players = server.get('players') or {}
+    if server.get('online') and players.get('sample'):
+        server['players'] = {
+            **players,
+            'sample': [p for p in players['sample'] if p.get('id') != ANONYMOUS_PLAYER_ID],
+        }
+    return server
+
+
+def _has_player_list(server: Dict[str, Any]) -> bool:
+    """服务器是否需要显示在线玩家列表（会额外占用 PLAYER_LIST_OFFSET 的高度）。"""
+    players = server.get('players') or {}
+    return bool(server.get('online') and players.get('online') != 0 and players.get('sample'))
+
+
+def _sorted_children(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按优先级排序同一层级的服务器（数值越小越靠前），优先级相同的保持配置中的顺序。"""
+    return sorted(nodes, key=lambda node: node.get('priority', DEFAULT_SERVER_PRIORITY))
+
+
+def _trunk_x(level: int) -> float:
+    """第 level 层子服务器的垂直主干的x坐标（位于父服务器图标的中线上）。"""
+    return LAYOUT_BASE_PADDING + (level - 1) * CHILD_INDENT_PX + LAYOUT_SERVER_ICON_SIZE / 2
+
+
+def build_layout(server_tree: List[Dict[str, Any]], show_all_servers: bool) -> List[Dict[str, Any]]:
+    """
+    将服务器树一次性展开为按绘制顺序排列的扁平行列表（迭代实现，不受递归深度限制）。
+
+    遍历时完成：跳过 ignore_in_list 的分支、过滤离线服务器（仍保留有可见子服的父服）、
+    按优先级排序、去掉匿名玩家。随后在扁平列表上计算每行的位置与连接线。
+
+    每行包含:
+        server: 服务器自身的字段（不含子树）
+        y: 相对服务器列表顶部的y坐标
+        height: 行高（有玩家列表时包含 PLAYER_LIST_OFFSET）
+        level: 缩进层级
+        has_players: 是否显示玩家列表
+        connectors: 该行范围内需要绘制的连接线线段（相对行左上角）
+    """
+    rows: List[Dict[str, Any]] = []
+    # 栈中的每一帧: [待访问的子节点(逆序), 该节点的行下标, 最后一个可见子行的下标]
+    # 被移除的总是列表末尾的行，因此仍在栈中的节点的行下标保持不变
+    stack: List[List[Any]] = [[list(reversed(_sorted_children(server_tree))), None, None]]
+
+    while stack:
+        frame = stack[-1]
+        pending = frame[0]
+
+        if pending:
+            node = pending.pop()
+            if node.get('ignore_in_list', False):
+                continue
+            server = _row_server(node)
+            rows.append({"server": server, "level": len(stack) - 1, "has_players": _has_player_list(server),
+                         "is_last_child": False})
+            stack.append([list(reversed(_sorted_children(node.get('children') or []))), len(rows) - 1, None])
+            continue
+
+        # 当前节点的子节点都已处理完毕
+        stack.pop()
+        index, last_child_index = frame[1], frame[2]
+        if last_child_index is not None:
+            rows[last_child_index]["is_last_child"] = True
+        if index is None:
+            continue
+
+        if show_all_servers or rows[index]["server"].get('online', False) or last_child_index is not None:
+            stack[-1][2] = index
+        else:
+            # 不可见节点没有可见的子节点，它一定是列表中的最后一行
+            rows.pop()
+
+    _assign_positions(rows)
+    return rows
+
+
+def _assign_positions(rows: List[Dict[str, Any]]):
+    """在扁平行列表上计算每行的y坐标、行高与连接线线段。"""
+    y_cursor = 0
+    # 垂直主干会继续延伸到后面兄弟节点的层级（升序），只有这些层级的主干需要穿过当前行
+    open_levels: List[int] = []
+    for index, row in enumerate(rows):
+        level = row["level"]
+        height = SERVER_ROW_HEIGHT + (PLAYER_LIST_OFFSET if row["has_players"] else 0)
+        while open_levels and open_levels[-1] >= level:
+            open_levels.pop()
+
+        # 祖先的主干从该行中穿过
+        connectors: List[Segment] = [(_trunk_x(k), 0, _trunk_x(k), height) for k in open_levels]
+        if level > 0:
+            # L 形连接线：垂直主干 + 指向自身图标的水平分支
+            line_y = LAYOUT_SERVER_ICON_SIZE / 2
+            trunk_end = line_y if row["is_last_child"] else height
+            connectors.append((_trunk_x(level), 0, _trunk_x(level), trunk_end))
+            connectors.append((_trunk_x(level), line_y, LAYOUT_BASE_PADDING + level * CHILD_INDENT_PX, line_y))
+            if not row["is_last_child"]:
+                open_levels.append(level)
+        if index + 1 < len(rows) and rows[index + 1]["level"] > level:
+            # 有子服时，从自身图标底部开始向下引出主干
+            connectors.append((_trunk_x(level + 1), LAYOUT_SERVER_ICON_SIZE, _trunk_x(level + 1), height))
+
+        row["y"] = y_cursor
+        row["height"] = height
+        row["connectors"] = connectors
+        del row["is_last_child"]
+        y_cursor += height
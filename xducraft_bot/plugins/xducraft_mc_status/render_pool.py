@@ -0,0 +1,139 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .constants import RENDER_POOL_TYPE, RENDER_POOL_WORKERS
+
+# 全局执行池实例，首次使用时创建
+_executor: Optional[Executor] = None
+_executor_type: str = ""
+
+# 渲染任务统计信息
+_stats: Dict[str, Any] = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "in_flight": 0,
+    "total_job_time": 0.0,
+    "last_job_time": 0.0,
+    "max_job_time": 0.0,
+    "total_wait_time": 0.0,
+    "last_wait_time": 0.0,
+}
+
+
+def _warm_worker():
+    """工作线程/进程的初始化函数：提前加载字体，避免首个任务承担加载开销。"""
+    from .fonts import preload_fonts
+    preload_fonts()
+
+
+def _timed_call(func: Callable, *args) -> Tuple[Any, float, float]:
+    """在工作线程/进程中执行任务，并返回 (结果, 开始时间戳, 耗时)。"""
+    started_at = time.time()
+    start = time.perf_counter()
+    result = func(*args)
+    return result, started_at, time.perf_counter() - start
+
+
+def _noop() -> None:
+    """空任务，仅用于预热工作线程/进程。"""
+    return None
+
+
+def _create_executor() -> Tuple[Executor, str]:
+    """根据配置创建执行池。"""
+    if RENDER_POOL_TYPE == "process":
+        # 子进程需要继承已初始化的 NoneBot 环境，因此只能使用 fork 启动方式
+        if "fork" in multiprocessing.get_all_start_methods():
+            executor = ProcessPoolExecutor(
+                max_workers=RENDER_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_warm_worker,
+            )
+            return executor, "process"
+        print("当前系统不支持 fork，渲染进程池回退为线程池")
+
+    executor = ThreadPoolExecutor(
+        max_workers=RENDER_POOL_WORKERS,
+        thread_name_prefix="mcs-render",
+        initializer=_warm_worker,
+    )
+    return executor, "thread"
+
+
+def get_render_executor() -> Executor:
+    """获取（必要时创建）渲染执行池。"""
+    global _executor, _executor_type
+    if _executor is None:
+        _executor, _executor_type = _create_executor()
+    return _executor
+
+
+def warm_up_render_pool():
+    """
+    创建执行池并让每个工作线程/进程都完成初始化。
+    使用 fork 的进程池会在第一次提交任务时立即 fork 出全部工作进程，因此本函数返回时子进程已经创建完毕。
+    """
+    executor = get_render_executor()
+    for _ in range(RENDER_POOL_WORKERS):
+        executor.submit(_noop)
+
+
+def shutdown_render_pool():
+    """关闭渲染执行池。"""
+    global _executor, _executor_type
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _executor_type = ""
+
+
+async def run_render_job(func: Callable, *args) -> Any:
+    """
+    将一个纯同步的渲染任务提交到执行池，并等待结果。
+    在进程池模式下，func 和 args 必须可以被 pickle。
+    """
+    executor = get_render_executor()
+    loop = asyncio.get_running_loop()
+
+    submitted_at = time.time()
+    _stats["submitted"] += 1
+    _stats["in_flight"] += 1
+    try:
+        result, started_at, job_time = await loop.run_in_executor(executor, _timed_call, func, *args)
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+
+    wait_time = max(0.0, started_at - submitted_at)
+    _stats["completed"] += 1
+    _stats["total_job_time"] += job_time
+    _stats["last_job_time"] = job_time
+    _stats["max_job_time"] = max(_stats["max_job_time"], job_time)
+    _stats["total_wait_time"] += wait_time
+    _stats["last_wait_time"] = wait_time
+    return result
+
+
+def get_render_stats() -> Dict[str, Any]:
+    """获取渲染执行池的统计信息（队列长度与每个任务的耗时）。"""
+    completed = _stats["completed"]
+    return {
+        "pool_type": _executor_type or "idle",
+        "workers": RENDER_POOL_WORKERS,
+        "in_flight": _stats["in_flight"],
+        "queue_length": max(0, _stats["in_flight"] - RENDER_POOL_WORKERS),
+        "submitted": _stats["submitted"],
+        "completed": completed,
+        "failed": _stats["failed"],
+        "last_job_time": _stats["last_job_time"],
+        "max_job_time": _stats["max_job_time"],
+        "avg_job_time": _stats["total_job_time"] / completed if completed else 0.0,
+        "last_wait_time": _stats["last_wait_time"],
+        "avg_wait_time": _stats["total_wait_time"] / completed if completed else 0.0,
+    }
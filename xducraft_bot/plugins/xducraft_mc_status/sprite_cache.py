@@ -0,0 +1,63 @@
+import hashlib
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageDraw
+
+from .bounded_cache import BoundedLRUCache
+from .constants import (LAYOUT_SERVER_ICON_SIZE, ICON_SPRITE_CACHE_MAX_BYTES, ICON_PLACEHOLDER_COLOR,
+                        SECONDARY_TEXT_COLOR)
+from .fonts import get_font
+
+# 以图标内容哈希为键的 LRU 缓存，值为已缩放好的 RGBA 图标（按像素字节数限制容量）
+_sprites = BoundedLRUCache(ICON_SPRITE_CACHE_MAX_BYTES, sizeof=lambda sprite: sprite.width * sprite.height * 4)
+_placeholder: Optional[Image.Image] = None
+
+
+def get_icon_key(icon_bytes: bytes) -> str:
+    """计算图标数据的内容哈希，用作精灵缓存（以及行图块缓存）的键。"""
+    return hashlib.sha1(icon_bytes).hexdigest()
+
+
+def _decode_sprite(icon_bytes: bytes) -> Image.Image:
+    """将原始图标数据解码并缩放为可直接粘贴的 RGBA 图标。"""
+    with Image.open(BytesIO(icon_bytes)) as img_avatar:
+        return img_avatar.resize((LAYOUT_SERVER_ICON_SIZE, LAYOUT_SERVER_ICON_SIZE)).convert("RGBA")
+
+
+def get_icon_sprite(icon_bytes: bytes, icon_key: Optional[str] = None) -> Image.Image:
+    """
+    获取图标数据对应的精灵图。
+    缓存命中时直接返回，未命中时解码、缩放并存入缓存。解码失败时抛出异常。
+    返回的图片被缓存共享，调用方不能修改它。
+    """
+    key = icon_key or get_icon_key(icon_bytes)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = _decode_sprite(icon_bytes)
+        _sprites.put(key, sprite)
+    return sprite
+
+
+def get_placeholder_sprite() -> Image.Image:
+    """获取没有图标（或图标无法解码）的服务器所使用的占位图标。"""
+    global _placeholder
+    if _placeholder is None:
+        size = LAYOUT_SERVER_ICON_SIZE
+        placeholder = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(placeholder)
+        draw.rounded_rectangle(xy=(0, 0, size - 1, size - 1), radius=8, fill=ICON_PLACEHOLDER_COLOR)
+        draw.text(xy=(size / 2, size / 2), text="?", fill=SECONDARY_TEXT_COLOR, font=get_font("mc_motd"),
+                  anchor="mm")
+        _placeholder = placeholder
+    return _placeholder
+
+
+def get_sprite_cache_stats() -> Dict[str, Any]:
+    """获取图标精灵缓存的统计信息。"""
+    return _sprites.stats()
+
+
+def clear_sprite_cache():
+    """清空图标精灵缓存。"""
+    _sprites.clear()
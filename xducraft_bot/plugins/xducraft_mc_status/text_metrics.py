@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Union
+
+from PIL import ImageFont
+
+from .constants import TEXT_METRICS_CACHE_SIZE
+
+Font = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+
+# 字体对象在进程内是唯一的（由 fonts 模块统一加载），因此可以直接作为缓存键的一部分。
+
+
+@lru_cache(maxsize=TEXT_METRICS_CACHE_SIZE)
+def text_length(font: Font, text: str) -> float:
+    """测量文本在给定字体下的前进宽度（等价于 ImageDraw.textlength）。"""
+    return font.getlength(text)
+
+
+@lru_cache(maxsize=TEXT_METRICS_CACHE_SIZE)
+def text_bbox(font: Font, text: str) -> Tuple[int, int, int, int]:
+    """测量文本以 (0, 0) 为起点时的包围盒（等价于 ImageDraw.textbbox((0, 0), ...)）。"""
+    return font.getbbox(text)
+
+
+def get_text_metrics_stats() -> Dict[str, Any]:
+    """获取文本测量缓存的统计信息。"""
+    hits = misses = size = 0
+    for cached_func in (text_length, text_bbox):
+        info = cached_func.cache_info()
+        hits += info.hits
+        misses += info.misses
+        size += info.currsize
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "entries": size,
+        "max_entries": TEXT_METRICS_CACHE_SIZE * 2,
+        "hit_rate": hits / total if total else 0.0,
+    }
+